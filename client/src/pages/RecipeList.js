@@ -4,13 +4,25 @@ import { Link } from "react-router-dom";
 import styled from "styled-components";
 import { Box, Button } from "../styles";
 
+// GET /recipes returns one page at a time and advertises the next one in the
+// X-Next-Cursor header; follow it until the last page so no recipe is left out.
+function fetchAllRecipes(cursor = null, loaded = []) {
+  const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+  return fetch(`/recipes?include=user${query}`).then((r) => {
+    if (!r.ok) return loaded;
+    const next = r.headers.get("X-Next-Cursor");
+    return r.json().then((page) => {
+      const recipes = loaded.concat(page);
+      return next ? fetchAllRecipes(next, recipes) : recipes;
+    });
+  });
+}
+
 function RecipeList() {
   const [recipes, setRecipes] = useState([]);
 
   useEffect(() => {
-    fetch("/recipes")
-      .then((r) => r.json())
-      .then(setRecipes);
+    fetchAllRecipes().then(setRecipes);
   }, []);
 
   return (
@@ -1,28 +1,83 @@
-from flask import Flask, request, jsonify, session, redirect
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate  # Import Flask-Migrate
-from werkzeug.security import generate_password_hash, check_password_hash
+import hmac
+from datetime import datetime
+
+import click
+from flask import Flask, Response, abort, request, jsonify, session, redirect, stream_with_context
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import PreconditionRequired
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models import db, User, Recipe  # Import models here
+from config import load_config
+from database import apply_sqlite_pragmas
+from hashing import HasherSaturated, PasswordHasher
+from ratelimit import RateLimited, RateLimiter
+from cache import LRUCache
+from sessions import ServerSideSessionInterface, SessionStore, SQLiteSessionBackend
+from schema import MIGRATIONS_DIR, check_schema_revision, include_object
+from validation import InvalidRecipe, validate_recipe, validate_recipe_patch
+from bulk import import_recipes, iter_ndjson
+from export import gzip_chunks, iter_recipe_ndjson
+from json_provider import FastJSONProvider
+from instrumentation import instrument_app, instrument_engine
+from search import search_recipes
+from recipe_query import RecipeListQuery
+from stats import rebuild_recipe_stats, stats_to_dict, user_stats_statement
+from pagination import MAX_INTEGER, InvalidQuery, decode_cursor, encode_cursor, is_integer, parse_integer, parse_limit
 
-def create_app(config_name):
-    app = Flask(__name__)
+def create_app(config_name=None, test_config=None):
+    """Builds the app for config_name ('development', 'production' or 'testing').
 
-    # Configure the app
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///yourdatabase.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.secret_key = 'your_secret_key'
+    config_name defaults to APP_CONFIG. Extensions are bound here rather than
+    at import, so importing this module creates no app, engine or database.
+    """
+    app = Flask(__name__)
+    app.config.update(load_config(config_name))
+    if test_config:
+        app.config.update(test_config)  # Per-test overrides, e.g. a file-backed database
 
-    if config_name == 'testing':
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'  # Use an in-memory database for tests
+    app.json = FastJSONProvider(app)
+    app.json.compact = app.config['JSON_COMPACT']
 
     db.init_app(app)
-
-    # Initialize Flask-Migrate
-    migrate = Migrate(app, db)
-
-    # Create the database tables only if not testing
+    for key in app.config['SQLALCHEMY_READ_REPLICAS']:
+        # Replicas mirror the primary's tables; init_app registers an empty
+        # MetaData per bind, which create_all() would then try on every app
+        db.metadatas.pop(key, None)
     with app.app_context():
-        db.create_all()
+        for key, engine in db.engines.items():
+            pragmas = app.config['SQLITE_PRAGMAS']
+            if key in app.config['SQLALCHEMY_READ_REPLICAS']:
+                # Journal settings belong to the writer and can't be set on read-only replicas
+                pragmas = {name: value for name, value in pragmas.items()
+                           if name not in ('journal_mode', 'synchronous')}
+            apply_sqlite_pragmas(engine, pragmas)
+            instrument_engine(engine)
+    instrument_app(app)
+    if app.config['TRUSTED_PROXIES']:
+        # So request.remote_addr, which keys the per-IP rate limit, is the client and not the proxy
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+    app.extensions['password_hasher'] = PasswordHasher.from_config(app.config)
+    app.extensions['rate_limiter'] = RateLimiter.from_config(app.config) if app.config['RATELIMIT_ENABLED'] else None
+    app.session_interface = ServerSideSessionInterface(SessionStore(
+        SQLiteSessionBackend(db),
+        LRUCache(app.config['SESSION_CACHE_SIZE'], app.config['SESSION_CACHE_TTL']),
+    ))
+
+    if app.config['CONFIG_NAME'] == 'testing':
+        with app.app_context():
+            # Tests build their throwaway schema straight from the models,
+            # which the migrations mirror (see models_testing/schema_test.py)
+            db.create_all()
+    else:
+        # Imported here: Flask-Migrate pulls in Alembic, which tests never need
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=MIGRATIONS_DIR, include_object=include_object)
+        if not app.config['SKIP_SCHEMA_CHECK']:
+            with app.app_context():
+                # Refuse to boot against a database that is behind or ahead of the migrations
+                check_schema_revision(db.engine)
 
     # Route for the root URL
     @app.route('/')
@@ -34,23 +89,33 @@ def create_app(config_name):
     def plants():
         return jsonify({"message": "Welcome to the Plants API!"})  # Sample response for /plants
 
+    def throttle(username):
+        # Refuse over-limit clients before paying for a password hash or a lookup
+        limiter = app.extensions['rate_limiter']
+        if limiter is not None:
+            limiter.hit(ip=request.remote_addr, username=username)
+
     # Define user signup route
     @app.route('/signup', methods=['POST'])
     def signup():
         data = request.get_json()
         username = data.get('username')
         password = data.get('password')
+        throttle(username)
 
         if not username or not password:
             return jsonify({"error": "Username and password are required."}), 422
 
-        if User.query.filter_by(username=username).first():
-            return jsonify({"error": "Username already exists."}), 422
-
         user = User(username=username)
         user.password = password  # Hash the password using setter
         db.session.add(user)
-        db.session.commit()
+        try:
+            # Let the unique constraint catch duplicates: one round trip, and no
+            # window for two concurrent signups to both pass a pre-check
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Username already exists."}), 422
 
         return jsonify({"message": "User created successfully."}), 201
 
@@ -60,9 +125,15 @@ def create_app(config_name):
         data = request.get_json()
         username = data.get('username')
         password = data.get('password')
+        throttle(username)
 
         user = User.query.filter_by(username=username).first()
         if user and user.verify_password(password):  # Use verify_password method from User model
+            if user.password_needs_rehash():
+                # Upgrade hashes made under an older policy while we have the plaintext
+                user.password = password
+                db.session.commit()
+            session.regenerate()  # Never authenticate a session id the client already held
             session['user_id'] = user.id  # Store user ID in session
             return jsonify({"message": "Login successful."}), 200
         return jsonify({"error": "Invalid username or password."}), 401
@@ -81,39 +152,275 @@ def create_app(config_name):
         if request.method == 'GET':
             if 'user_id' not in session:  # Check if user is logged in
                 return jsonify({"error": "Unauthorized access."}), 401
-            all_recipes = Recipe.query.filter_by(user_id=session['user_id']).all()  # Fetch user's recipes
-            return jsonify([recipe.to_dict() for recipe in all_recipes]), 200
+            try:
+                list_query = RecipeListQuery(request.args, app.config['RECIPES_PAGE_SIZE'],
+                                             app.config['RECIPES_MAX_PAGE_SIZE'])
+            except InvalidQuery as e:
+                return jsonify({"error": str(e)}), 422
+
+            # The user's recipes_version changes whenever any of their recipes does,
+            # so it identifies this representation without touching the recipe table
+            version = db.session.execute(list_query.version_statement(session['user_id'])).first()
+            if version is None:
+                return jsonify({"error": "Unauthorized access."}), 401
+            etag = list_query.etag(session['user_id'], version, request.query_string)
+            cache_headers = {'Cache-Control': 'private, no-cache', 'Vary': 'Cookie'}
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304, headers=cache_headers)
+                response.set_etag(etag)
+                return response
+
+            # Keyset pagination: seek past the last row seen instead of using OFFSET,
+            # so deep pages cost the same as the first one. Only the requested
+            # columns are loaded, and rows are serialized without ORM hydration.
+            page, next_cursor = list_query.page(db.session.execute(list_query.statement(session['user_id'])))
+            response = jsonify(page)
+            response.headers.update(cache_headers)
+            response.set_etag(etag)
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response, 200
 
         if request.method == 'POST':
             if 'user_id' not in session:  # Check if user is logged in
                 return jsonify({"error": "Unauthorized access."}), 401
             
-            data = request.get_json()
-            title = data.get('title')
-            instructions = data.get('instructions')
-            minutes_to_complete = data.get('minutes_to_complete')
+            try:
+                values = validate_recipe(request.get_json())  # Validate input
+            except InvalidRecipe as e:
+                return jsonify({"error": str(e)}), 422
 
-            if not title or not instructions or minutes_to_complete is None:  # Validate input
-                return jsonify({"error": "Invalid recipe data."}), 422
-            
             new_recipe = Recipe(
-                title=title,
-                instructions=instructions,
-                minutes_to_complete=minutes_to_complete,
+                **values,
                 user_id=session['user_id']  # Associate with logged-in user
-            )  
+            )
             db.session.add(new_recipe)
             db.session.commit()
             return jsonify({"message": "Recipe created successfully."}), 201
 
+    def expected_version():
+        # PATCH must name the version it edits: If-Match carries the ETag from GET /recipes/<id>.
+        # `If-Match: *` opts out, overwriting whatever version is current.
+        if request.if_match.star_tag:
+            return None
+        tags = request.if_match.as_set()
+        if len(tags) != 1:
+            raise PreconditionRequired()
+        tag = next(iter(tags))
+        # A tag no recipe version could have (versions start at 1) matches none, and gets the 412
+        if not (tag.isascii() and tag.isdigit() and len(tag) <= len(str(MAX_INTEGER))) or int(tag) > MAX_INTEGER:
+            return 0
+        return int(tag)
+
+    # Larger ids can't exist and would overflow the bind; the converter 404s them
+    @app.route(f'/recipes/<int(max={MAX_INTEGER}):recipe_id>', methods=['GET', 'PATCH', 'DELETE'])
+    def recipe(recipe_id):
+        if 'user_id' not in session:  # Check if user is logged in
+            return jsonify({"error": "Unauthorized access."}), 401
+        # Ownership is part of every statement's WHERE clause rather than checked
+        # after loading, and other users' recipes are indistinguishable from missing ones
+        owned = (Recipe.id == recipe_id, Recipe.user_id == session['user_id'])
+        fields = [getattr(Recipe, field) for field in Recipe.SERIALIZABLE_FIELDS]
+
+        if request.method == 'GET':
+            row = db.session.execute(select(*fields, Recipe.version).where(*owned)).first()
+            if row is None:
+                return jsonify({"error": "Recipe not found."}), 404
+            if request.if_none_match.contains(str(row.version)):
+                response = app.response_class(status=304)
+                response.set_etag(str(row.version))
+                return response
+            response = jsonify({field: getattr(row, field) for field in Recipe.SERIALIZABLE_FIELDS})
+            response.set_etag(str(row.version))
+            return response, 200
+
+        if request.method == 'PATCH':
+            try:
+                values = validate_recipe_patch(request.get_json(silent=True))
+                version = expected_version()
+            except InvalidRecipe as e:
+                return jsonify({"error": str(e)}), 422
+            except PreconditionRequired:
+                return jsonify({"error": "If-Match with the recipe's ETag is required."}), 428
+
+            # One UPDATE that checks ownership and version and writes only the
+            # submitted columns, so e.g. a minutes-only edit skips the FTS trigger
+            statement = update(Recipe).where(*owned)
+            if version is not None:
+                statement = statement.where(Recipe.version == version)
+            row = db.session.execute(
+                statement.values(**values, version=Recipe.version + 1).returning(*fields, Recipe.version)
+                .execution_options(synchronize_session=False)
+            ).first()
+            db.session.commit()
+            if row is None:
+                # Only a failed update pays for a second query, to tell why
+                current = db.session.execute(select(Recipe.version).where(*owned)).scalar()
+                if current is None:
+                    return jsonify({"error": "Recipe not found."}), 404
+                response = jsonify({"error": "Recipe was modified; fetch it again and retry."})
+                response.set_etag(str(current))
+                return response, 412
+            response = jsonify({field: getattr(row, field) for field in Recipe.SERIALIZABLE_FIELDS})
+            response.set_etag(str(row.version))
+            return response, 200
+
+        if request.method == 'DELETE':
+            deleted = db.session.execute(
+                delete(Recipe).where(*owned).execution_options(synchronize_session=False)).rowcount
+            db.session.commit()
+            if not deleted:
+                return jsonify({"error": "Recipe not found."}), 404
+            return '', 204
+
+    @app.route('/recipes/bulk', methods=['POST'])
+    def bulk_import_recipes():
+        if 'user_id' not in session:  # Check if user is logged in
+            return jsonify({"error": "Unauthorized access."}), 401
+
+        if request.mimetype == 'application/x-ndjson':
+            rows = iter_ndjson(request.stream)  # Streamed line by line
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return jsonify({"error": "Expected a JSON array or an NDJSON body."}), 422
+
+        report = import_recipes(
+            db.session, rows, session['user_id'],
+            batch_size=app.config['RECIPES_BULK_BATCH_SIZE'],
+            max_errors=app.config['RECIPES_BULK_MAX_ERRORS'],
+        )
+        return jsonify(report), 201 if report['created'] else 422
+
+    @app.route('/recipes/search', methods=['GET'])
+    def search():
+        if 'user_id' not in session:  # Check if user is logged in
+            return jsonify({"error": "Unauthorized access."}), 401
+
+        try:
+            limit = parse_limit(request.args.get('limit'),
+                                app.config['RECIPES_PAGE_SIZE'], app.config['RECIPES_MAX_PAGE_SIZE'])
+            window = app.config['RECIPES_SEARCH_WINDOW']
+            offset = 0
+            if request.args.get('cursor'):
+                offset = decode_cursor(request.args['cursor']).get('offset')
+                if not is_integer(offset) or not 0 < offset < window:
+                    raise InvalidQuery("Invalid cursor.")
+            limit = min(limit, window - offset)
+            results = search_recipes(db.session, session['user_id'], request.args.get('q', ''),
+                                     limit + 1, offset)
+        except InvalidQuery as e:
+            return jsonify({"error": str(e)}), 422
+
+        page = results[:limit]
+        response = jsonify(page)
+        if len(results) > limit and offset + limit < window:
+            response.headers['X-Next-Cursor'] = encode_cursor({'offset': offset + limit})
+        return response, 200
+
+    @app.route('/recipes/export', methods=['GET'])
+    def export_recipes():
+        if 'user_id' not in session:  # Check if user is logged in
+            return jsonify({"error": "Unauthorized access."}), 401
+
+        # Parsed before streaming starts, since an error mid-stream can't change the status
+        try:
+            since_id = parse_integer(request.args.get('since_id', 0), 'since_id')
+        except InvalidQuery as e:
+            return jsonify({"error": str(e)}), 422
+
+        chunks = iter_recipe_ndjson(db.session, session['user_id'], since_id,
+                                    app.config['RECIPES_EXPORT_BATCH_SIZE'], app.json.dumps_bytes)
+        headers = {'Vary': 'Accept-Encoding'}
+        if request.accept_encodings['gzip']:
+            chunks = gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        return Response(stream_with_context(chunks), mimetype='application/x-ndjson', headers=headers)
+
+    @app.route('/users/me/stats', methods=['GET'])
+    def my_stats():
+        if 'user_id' not in session:  # Check if user is logged in
+            return jsonify({"error": "Unauthorized access."}), 401
+
+        # Read from the trigger-maintained summary row, never from the recipe table
+        row = db.session.execute(user_stats_statement(session['user_id'])).first()
+        if row is None:
+            return jsonify({"error": "Unauthorized access."}), 401
+        return jsonify(stats_to_dict(row)), 200
+
+    def metrics_allowed():
+        token = app.config['METRICS_TOKEN']
+        if token and hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                         f'Bearer {token}'.encode()):
+            return True
+        return request.remote_addr in app.config['METRICS_ALLOWED_IPS']
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if not metrics_allowed():
+            abort(404)  # Traffic and hash-pool figures are for operators; don't advertise the endpoint
+        body = app.extensions['request_metrics'].render(app.extensions['password_hasher'].metrics)
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
+    @app.cli.command('hash-report')
+    def hash_report():
+        """Show how many users are on each password hash scheme."""
+        scheme = func.substr(User._password_hash, 1, func.instr(User._password_hash, '$') - 1)
+        count = func.count().label('count')
+        rows = db.session.execute(
+            select(scheme.label('scheme'), count).group_by(scheme).order_by(count.desc())
+        ).all()
+        current = app.extensions['password_hasher'].method
+        for row in rows:
+            marker = ' (current)' if row.scheme == current else ''
+            click.echo(f"{row.scheme}\t{row.count}{marker}")
+
+    @app.cli.command('revoke-sessions')
+    @click.argument('username')
+    def revoke_sessions(username):
+        """Log a user out of every session, e.g. after a compromise."""
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named {username}.")
+        removed = app.session_interface.store.revoke_user(user.id)
+        click.echo(f"Revoked {removed} session(s) for {username}.")
+
+    @app.cli.command('purge-sessions')
+    def purge_sessions():
+        """Delete expired sessions from the session store."""
+        removed = app.session_interface.store.backend.purge_expired(datetime.utcnow())
+        click.echo(f"Purged {removed} expired session(s).")
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recompute every user's recipe stats from the recipe table, e.g. after a backfill."""
+        with db.engine.begin() as conn:
+            users = rebuild_recipe_stats(conn)
+        click.echo(f"Rebuilt recipe stats for {users} user(s).")
+
     @app.errorhandler(404)
     def not_found(e):
         return jsonify(error="Not found"), 404
 
+    @app.errorhandler(HasherSaturated)
+    def hasher_saturated(e):
+        return jsonify(error="Server busy, try again shortly."), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(RateLimited)
+    def rate_limited(e):
+        return jsonify(error="Too many attempts, try again later."), 429, {'Retry-After': str(e.retry_after)}
+
     return app
 
-# Create the app instance
-app = create_app('development')
+def __getattr__(name):
+    # `gunicorn app:app`, `flask run` and scripts build the app on first access
+    # to `app`, so importing this module for create_app() (tests, workers using
+    # the factory) does no I/O
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,443 @@
+"""ASGI entry point: the auth and recipe routes on an asyncio engine.
+
+/signup, /login, /logout and /recipes are served by coroutines that talk to
+the database through SQLAlchemy's asyncio extension (aiosqlite), and password
+hashing runs in an executor, so a slow hash or write no longer holds a worker
+thread. Every other route is handed to the Flask app in a thread. Responses are
+built with the Flask app's JSON provider and session interface, so bodies,
+status codes and headers match the WSGI app byte for byte.
+
+Run it with any ASGI server, e.g. ``uvicorn asgi:app``.
+"""
+import asyncio
+import contextvars
+import functools
+import io
+import threading
+from io import BytesIO
+
+from flask.testing import FlaskClient
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import HTTP_STATUS_CODES
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.test import run_wsgi_app
+
+from app import create_app
+from database import apply_sqlite_pragmas, async_database_url
+from hashing import HasherSaturated
+from instrumentation import (current_timings, finish_request, instrument_engine, observe_response,
+                             start_request)
+from models import db, User, Recipe
+from pagination import InvalidQuery
+from ratelimit import RateLimited
+from recipe_query import RecipeListQuery
+from validation import InvalidRecipe, validate_recipe
+
+
+class BodyTooLarge(Exception):
+    """Raised when a hot route's request body exceeds ASGI_MAX_BODY_SIZE."""
+
+
+async def read_body(receive, limit):
+    """Buffers a whole request body for the coroutine routes, refusing more than limit bytes."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class ReceiveStream(io.RawIOBase):
+    """wsgi.input for the Flask fallback, pulling body chunks from receive() as they are read.
+
+    Reads happen on the worker thread running Flask; each one that runs dry
+    waits for the next http.request message on the event loop. An upload is
+    therefore consumed at the pace Flask reads it, e.g. NDJSON line by line
+    in POST /recipes/bulk, and never held in memory as a whole.
+    """
+
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.pending = memoryview(b'')
+        self.done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending and not self.done:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            self.pending = memoryview(message.get('body', b''))
+            # A disconnect ends the body early; Flask sees a truncated upload
+            self.done = message['type'] == 'http.disconnect' or not message.get('more_body')
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def build_environ(scope, stream):
+    """Translates an ASGI HTTP scope and a file object with its body into a WSGI environ."""
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name.encode().decode('latin-1'),
+        'PATH_INFO': path.encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': (scope.get('client') or ('',))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': stream,
+        'wsgi.input_terminated': True,  # The stream ends with the body, chunked or not
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+def build_scope(environ):
+    """Translates a WSGI environ into an ASGI HTTP scope; the inverse of build_environ()."""
+    headers = [
+        (name[5:].replace('_', '-').lower().encode('latin-1'), value.encode('latin-1'))
+        for name, value in environ.items() if name.startswith('HTTP_')
+    ]
+    for name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        if environ.get(name):
+            headers.append((name.replace('_', '-').lower().encode('latin-1'), environ[name].encode('latin-1')))
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': environ.get('SERVER_PROTOCOL', 'HTTP/1.1').split('/', 1)[1],
+        'method': environ['REQUEST_METHOD'],
+        'scheme': environ['wsgi.url_scheme'],
+        'path': environ['PATH_INFO'].encode('latin-1').decode(),
+        'query_string': environ.get('QUERY_STRING', '').encode('latin-1'),
+        'root_path': environ.get('SCRIPT_NAME', '').encode('latin-1').decode(),
+        'headers': headers,
+        'client': (environ.get('REMOTE_ADDR', ''), 0),
+        'server': (environ['SERVER_NAME'], int(environ['SERVER_PORT'])),
+    }
+
+
+def response_start(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    }
+
+
+class ASGIApp:
+    """Serves a Flask app over ASGI, with the hot routes running as coroutines."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.hasher = flask_app.extensions['password_hasher']
+        with flask_app.app_context():
+            url = db.engine.url  # As resolved by Flask-SQLAlchemy, e.g. relative to the instance folder
+        self.engine = create_async_engine(async_database_url(url),
+                                          **flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+        apply_sqlite_pragmas(self.engine.sync_engine, flask_app.config['SQLITE_PRAGMAS'])
+        instrument_engine(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.max_body_size = flask_app.config['ASGI_MAX_BODY_SIZE']
+        # The hot routes build their request without going through flask_app.wsgi_app, so they
+        # apply TRUSTED_PROXIES themselves; ProxyFix rewrites the environ before calling its app
+        proxies = flask_app.config['TRUSTED_PROXIES']
+        self.proxy_fix = ProxyFix(lambda environ, start_response: None, x_for=proxies, x_proto=proxies) \
+            if proxies else None
+        self.routes = {
+            ('POST', '/signup'): self.signup,
+            ('POST', '/login'): self.login,
+            ('DELETE', '/logout'): self.logout,
+            ('GET', '/recipes'): self.list_recipes,
+            ('POST', '/recipes'): self.create_recipe,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            return await self.call_flask(scope, receive, send)
+        try:
+            # The hot routes take small JSON bodies, so those are read up front, within a cap
+            environ = build_environ(scope, BytesIO(await read_body(receive, self.max_body_size)))
+        except BodyTooLarge:
+            environ = build_environ(scope, BytesIO())
+            return await self.send_response(self.json({"error": "Request body too large."}, 413), environ, send)
+
+        if self.proxy_fix is not None:
+            self.proxy_fix(environ, None)
+        token = start_request()
+        try:
+            await self.handle(handler, environ, scope, send)
+        finally:
+            finish_request(token)
+
+    async def handle(self, handler, environ, scope, send):
+        request = self.flask_app.request_class(environ)
+        interface = self.flask_app.session_interface
+        # The session store is synchronous; a cached session costs a thread hop, not a query
+        session = await self.run_blocking(self.in_app_context, interface.open_session, self.flask_app, request)
+        try:
+            response = await handler(request, session)
+        except HasherSaturated:
+            response = self.json({"error": "Server busy, try again shortly."}, 503)
+            response.headers['Retry-After'] = '1'
+        except RateLimited as e:
+            response = self.json({"error": "Too many attempts, try again later."}, 429)
+            response.headers['Retry-After'] = str(e.retry_after)
+        except HTTPException as e:
+            response = e.get_response(environ)
+        if not interface.is_null_session(session):
+            await self.run_blocking(self.in_app_context, interface.save_session, self.flask_app, session, response)
+        observe_response(self.flask_app, scope['method'], scope['path'], response, current_timings())
+        await self.send_response(response, environ, send)
+
+    async def send_response(self, response, environ, send):
+        started = []
+        body = b''.join(response(environ, lambda status, headers, exc_info=None: started.extend((status, headers))))
+        await send(response_start(*started))
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                self.hasher.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def call_flask(self, scope, receive, send):
+        """Runs a request through the Flask app in a worker thread, streaming both bodies."""
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, io.BufferedReader(ReceiveStream(receive, loop)))
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = []
+            iterable = self.flask_app(environ, lambda status, headers, exc_info=None: started.extend((status, headers)))
+            try:
+                for chunk in iterable:
+                    if started:
+                        send_from_thread(response_start(*started))
+                        started.clear()
+                    send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if started:
+                    send_from_thread(response_start(*started))
+                send_from_thread({'type': 'http.response.body'})
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()  # Runs Flask's teardown, e.g. removing the scoped session
+
+        await loop.run_in_executor(None, run)
+
+    async def run_blocking(self, fn, *args):
+        # Carry the request's context over, so hashing and queries in the thread count towards it
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    def in_app_context(self, fn, *args):
+        with self.flask_app.app_context():
+            return fn(*args)
+
+    def json(self, obj, status=200):
+        response = self.flask_app.json.response(obj)
+        response.status_code = status
+        return response
+
+    def test_client(self, use_cookies=True):
+        return ASGITestClient(self, self.flask_app.response_class, use_cookies=use_cookies)
+
+    def throttle(self, request, username):
+        limiter = self.flask_app.extensions['rate_limiter']
+        if limiter is not None:
+            limiter.hit(ip=request.remote_addr, username=username)
+
+    async def signup(self, request, session):
+        data = request.get_json()
+        username = data.get('username')
+        password = data.get('password')
+        self.throttle(request, username)
+
+        if not username or not password:
+            return self.json({"error": "Username and password are required."}, 422)
+
+        password_hash = await self.run_blocking(self.hasher.hash, password)
+        async with self.sessionmaker() as db_session:
+            db_session.add(User(username=username, _password_hash=password_hash))
+            try:
+                await db_session.commit()
+            except IntegrityError:
+                return self.json({"error": "Username already exists."}, 422)
+
+        return self.json({"message": "User created successfully."}, 201)
+
+    async def login(self, request, session):
+        data = request.get_json()
+        username = data.get('username')
+        password = data.get('password')
+        self.throttle(request, username)
+
+        async with self.sessionmaker() as db_session:
+            user = (await db_session.execute(select(User).filter_by(username=username))).scalars().first()
+            if user and await self.run_blocking(self.hasher.verify, user._password_hash, password):
+                if self.hasher.needs_rehash(user._password_hash):
+                    user._password_hash = await self.run_blocking(self.hasher.hash, password)
+                    await db_session.commit()
+                session.regenerate()  # Never authenticate a session id the client already held
+                session['user_id'] = user.id
+                return self.json({"message": "Login successful."}, 200)
+        return self.json({"error": "Invalid username or password."}, 401)
+
+    async def logout(self, request, session):
+        if 'user_id' not in session:
+            return self.json({"error": "Unauthorized"}, 401)
+        session.pop('user_id', None)
+        return self.json({"message": "Logged out successfully."}, 204)
+
+    async def list_recipes(self, request, session):
+        if 'user_id' not in session:
+            return self.json({"error": "Unauthorized access."}, 401)
+        try:
+            list_query = RecipeListQuery(request.args, self.flask_app.config['RECIPES_PAGE_SIZE'],
+                                         self.flask_app.config['RECIPES_MAX_PAGE_SIZE'])
+        except InvalidQuery as e:
+            return self.json({"error": str(e)}, 422)
+
+        async with self.sessionmaker() as db_session:
+            version = (await db_session.execute(list_query.version_statement(session['user_id']))).first()
+            if version is None:
+                return self.json({"error": "Unauthorized access."}, 401)
+            etag = list_query.etag(session['user_id'], version, request.query_string)
+            cache_headers = {'Cache-Control': 'private, no-cache', 'Vary': 'Cookie'}
+            if request.if_none_match.contains(etag):
+                response = self.flask_app.response_class(status=304, headers=cache_headers)
+                response.set_etag(etag)
+                return response
+
+            page, next_cursor = list_query.page(
+                await db_session.execute(list_query.statement(session['user_id'])))
+
+        response = self.json(page)
+        response.headers.update(cache_headers)
+        response.set_etag(etag)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+
+    async def create_recipe(self, request, session):
+        if 'user_id' not in session:
+            return self.json({"error": "Unauthorized access."}, 401)
+
+        try:
+            values = validate_recipe(request.get_json())
+        except InvalidRecipe as e:
+            return self.json({"error": str(e)}, 422)
+
+        async with self.sessionmaker() as db_session:
+            db_session.add(Recipe(**values, user_id=session['user_id']))
+            await db_session.commit()
+        return self.json({"message": "Recipe created successfully."}, 201)
+
+
+class ASGITestClient(FlaskClient):
+    """Flask test client whose requests go through an ASGIApp.
+
+    Requests are translated to ASGI and run on a private event loop, so the
+    same tests exercise both deployment modes. session_transaction() and
+    .application still work against the wrapped Flask app.
+    """
+
+    def __init__(self, asgi_app, *args, **kwargs):
+        super().__init__(asgi_app.flask_app, *args, **kwargs)
+        self.asgi_app = asgi_app
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def run_wsgi_app(self, environ, buffered=False):
+        if self.cookie_jar is not None:
+            self.cookie_jar.inject_wsgi(environ)
+        rv = run_wsgi_app(self.call_asgi, environ, buffered=buffered)
+        if self.cookie_jar is not None:
+            self.cookie_jar.extract_wsgi(environ, rv[2])
+        return rv
+
+    def call_asgi(self, environ, start_response):
+        body = environ['wsgi.input'].read()
+        messages = asyncio.run_coroutine_threadsafe(
+            self.request(build_scope(environ), body), self.loop).result()
+        start = messages[0]
+        status = f"{start['status']} {HTTP_STATUS_CODES.get(start['status'], 'UNKNOWN').upper()}"
+        start_response(status, [(name.decode('latin-1'), value.decode('latin-1'))
+                                for name, value in start['headers']])
+        return [message.get('body', b'') for message in messages[1:]]
+
+    async def request(self, scope, body):
+        messages = []
+        received = asyncio.Event()
+
+        async def receive():
+            if received.is_set():
+                await asyncio.Future()  # Nothing more to read; a real server would wait for disconnect
+            received.set()
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.asgi_app(scope, receive, send)
+        return messages
+
+    def close(self):
+        """Disposes of the async engine's connections and stops the event loop."""
+        asyncio.run_coroutine_threadsafe(self.asgi_app.engine.dispose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        self.close()
+
+
+def create_asgi_app(config_name=None, test_config=None):
+    return ASGIApp(create_app(config_name, test_config))
+
+
+def __getattr__(name):
+    # `uvicorn asgi:app` builds the app on first access, so importing this
+    # module under the in-memory test config doesn't need a file
+    if name == 'app':
+        globals()['app'] = create_asgi_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Latency and throughput benchmark for the HTTP endpoints, with tracked baselines.
+
+Seeds a throwaway SQLite database per dataset size, then drives /signup,
+/login, GET and POST /recipes and the other list endpoints, both through the
+Flask test client and over HTTP against a real WSGI server (werkzeug's,
+threaded). Reports p50/p95/p99 latency and requests per second per endpoint.
+Run from the server directory:
+
+    python benchmarks/http_bench.py                         # compare with the baseline
+    python benchmarks/http_bench.py --save                  # record a new baseline
+    python benchmarks/http_bench.py --sizes 1000,1000000 --requests 500
+
+Exits with status 1 when an endpoint's p95 latency grows, or its throughput
+drops, by more than --threshold relative to the baseline. Baselines are
+machine-specific: record one on the machine that runs the comparison.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('APP_CONFIG', 'testing')
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from app import create_app  # noqa: E402
+from json_provider import orjson  # noqa: E402
+from models import db, User  # noqa: E402
+from seeding import seed  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'http.json')
+PASSWORD = 'password'
+SIGNUPS = itertools.count()  # Keeps usernames unique across transports
+
+
+def scenarios(username):
+    """(name, method, path, json body factory or None, how many requests relative to --requests)."""
+    return [
+        ('POST /signup', 'POST', '/signup', lambda: {'username': f'bench{next(SIGNUPS)}', 'password': PASSWORD}, 0.1),
+        ('POST /login', 'POST', '/login', lambda: {'username': username, 'password': PASSWORD}, 0.1),
+        ('GET /recipes', 'GET', '/recipes', None, 1),
+        ('GET /recipes?sort,limit', 'GET', '/recipes?sort=-minutes_to_complete&limit=20', None, 1),
+        ('GET /recipes?include=user', 'GET', '/recipes?include=user&fields=title', None, 1),
+        ('GET /recipes/search', 'GET', '/recipes/search?q=garlic&limit=20', None, 1),
+        ('GET /recipes/export', 'GET', '/recipes/export', None, 0.1),
+        ('POST /recipes', 'POST', '/recipes',
+         lambda: {'title': 'Benchmark stew', 'instructions': 'Simmer the lentils.', 'minutes_to_complete': 45}, 1),
+    ]
+
+
+class TestClientTransport:
+    name = 'test-client'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class WSGITransport:
+    """Plain HTTP requests to a threaded werkzeug server, carrying the session cookie by hand."""
+
+    name = 'wsgi-server'
+
+    def __init__(self, app):
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No access log line per request
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.cookies = SimpleCookie()
+
+    def request(self, method, path, body):
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.server_port)
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={morsel.value}' for key, morsel in self.cookies.items())
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        conn.request(method, path, payload, headers)
+        response = conn.getresponse()
+        response.read()
+        for header in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(header)
+        conn.close()
+        return response.status
+
+    def close(self):
+        self.server.shutdown()
+
+
+def percentile(samples, p):
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1]
+
+
+def run_scenario(transport, method, path, body, requests):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        sent = time.perf_counter()
+        status = transport.request(method, path, body() if body else None)
+        latencies.append(time.perf_counter() - sent)
+        if status >= 400:
+            raise RuntimeError(f'{method} {path} returned {status}')
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'rps': requests / elapsed,
+    }
+
+
+def run(sizes, requests, transports, hash_iterations):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app('testing', {
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                'PASSWORD_HASH_ITERATIONS': hash_iterations,
+                'SERVER_TIMING': False,
+            })
+            with app.app_context():
+                db.create_all()
+                seed(db.engine, max(1, size // 1000), size, password=PASSWORD,
+                     hasher=app.extensions['password_hasher'])
+                username = User.query.order_by(User.id).first().username
+
+            for transport_class in transports:
+                transport = transport_class(app)
+                try:
+                    transport.request('POST', '/login', {'username': username, 'password': PASSWORD})
+                    for name, method, path, body, share in scenarios(username):
+                        key = f'{transport.name} {size} {name}'
+                        results[key] = run_scenario(transport, method, path, body, max(5, int(requests * share)))
+                        print(format_row(key, results[key]), flush=True)
+                finally:
+                    transport.close()
+            with app.app_context():
+                db.engine.dispose()
+    return results
+
+
+def format_row(key, result):
+    return (f"{key:<52} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['rps']:>9.1f}")
+
+
+def compare(results, baseline, threshold):
+    """Returns the keys whose p95 grew, or throughput fell, by more than threshold."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + threshold) or result['rps'] < before['rps'] * (1 - threshold):
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--sizes', default='1000,100000', help='Comma-separated recipe counts to seed.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per read/write endpoint; auth and '
+                                                                   'export endpoints run a tenth as many.')
+    parser.add_argument('--transport', choices=('all', 'test-client', 'wsgi-server'), default='all')
+    parser.add_argument('--hash-iterations', type=int, default=260000,
+                        help='PBKDF2 cost for /signup and /login; the production default.')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline JSON to compare with or save to.')
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed fractional regression.')
+    args = parser.parse_args(argv)
+
+    transports = [transport for transport in (TestClientTransport, WSGITransport)
+                  if args.transport in ('all', transport.name)]
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"{'endpoint':<52} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9}")
+    results = run(sizes, args.requests, transports, args.hash_iterations)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                                'encoder': 'orjson' if orjson else 'stdlib json'},
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Saved baseline to {args.baseline}.')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --save to record one.')
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for key in regressions:
+        print(f'REGRESSION {key}')
+        print(format_row('  baseline', baseline[key]))
+        print(format_row('  now', results[key]))
+    print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}.')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
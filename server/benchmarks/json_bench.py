@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for serializing GET /recipes responses.
+
+Compares the old path (ORM objects -> to_dict() -> pretty-printed stdlib JSON)
+with row tuples encoded compactly by the stdlib and by FastJSONProvider, for
+lists of 10, 1k and 10k recipes. Run from the server directory:
+
+    python benchmarks/json_bench.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('APP_CONFIG', 'testing')
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from json_provider import orjson  # noqa: E402
+from models import db, Recipe, User  # noqa: E402
+
+SIZES = (10, 1000, 10000)
+MIN_SECONDS = 0.5
+
+
+def measure(fn):
+    """Returns (calls per second, bytes per response) for fn."""
+    body = fn()
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return calls / elapsed, len(body)
+
+
+def main():
+    app = create_app('testing')
+    with app.test_request_context():
+        user = User(username='bench')
+        user.password = 'password'
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(insert(Recipe), [
+            {'title': f'Recipe {i}', 'instructions': 'Whisk the eggs. ' * 20,
+             'minutes_to_complete': i % 90, 'user_id': user.id}
+            for i in range(max(SIZES))
+        ])
+        db.session.commit()
+
+        columns = [getattr(Recipe, field) for field in Recipe.SERIALIZABLE_FIELDS]
+        print(f"encoder: {'orjson' if orjson else 'stdlib json'}")
+        print(f"{'recipes':>8} {'variant':<28} {'responses/s':>12} {'bytes':>10}")
+        for size in SIZES:
+            def orm_pretty():
+                app.json.compact = False
+                recipes = Recipe.query.filter_by(user_id=user.id).limit(size).all()
+                return app.json.response([recipe.to_dict() for recipe in recipes]).get_data()
+
+            def rows_stdlib_compact():
+                app.json.compact = True
+                result = db.session.execute(select(*columns).where(Recipe.user_id == user.id).limit(size))
+                keys = list(result.keys())
+                return app.json.dumps([dict(zip(keys, row)) for row in result], separators=(',', ':')).encode()
+
+            def rows_fast_compact():
+                app.json.compact = True
+                result = db.session.execute(select(*columns).where(Recipe.user_id == user.id).limit(size))
+                keys = list(result.keys())
+                return app.json.response([dict(zip(keys, row)) for row in result]).get_data()
+
+            for name, fn in (('orm + to_dict + pretty', orm_pretty),
+                             ('rows + stdlib compact', rows_stdlib_compact),
+                             ('rows + FastJSONProvider', rows_fast_compact)):
+                rate, size_bytes = measure(fn)
+                print(f"{size:>8} {name:<28} {rate:>12.1f} {size_bytes:>10}")
+
+
+if __name__ == '__main__':
+    main()
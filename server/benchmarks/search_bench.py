@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Latency benchmark for GET /recipes/search at large table sizes.
+
+Builds a throwaway SQLite database per size (default 100k and 1M recipes,
+1000 recipes per user) and times search_recipes() for common and rare terms.
+Run from the server directory, optionally passing sizes:
+
+    python benchmarks/search_bench.py 100000 1000000
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('APP_CONFIG', 'testing')
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, Recipe, User  # noqa: E402
+from search import search_recipes  # noqa: E402
+
+RECIPES_PER_USER = 1000
+BATCH_SIZE = 10000
+QUERIES = 200
+VOCABULARY = [f'word{i}' for i in range(5000)]
+COMMON = ['stir', 'bake', 'salt']
+
+
+def instructions(rng):
+    words = rng.choices(VOCABULARY, k=30) + rng.sample(COMMON, 2)
+    rng.shuffle(words)
+    return ' '.join(words)
+
+
+def build(app, size, rng):
+    users = max(size // RECIPES_PER_USER, 1)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', '_password_hash': 'x'} for i in range(users)
+        ])
+        for start in range(0, size, BATCH_SIZE):
+            db.session.execute(insert(Recipe), [
+                {'title': ' '.join(rng.choices(VOCABULARY, k=3)), 'instructions': instructions(rng),
+                 'minutes_to_complete': rng.randint(5, 120), 'user_id': i % users + 1}
+                for i in range(start, min(start + BATCH_SIZE, size))
+            ])
+            db.session.commit()
+    return users
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(sizes):
+    rng = random.Random(42)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'search.db')}"})
+            start = time.perf_counter()
+            users = build(app, size, rng)
+            print(f"{size} recipes built in {time.perf_counter() - start:.1f}s")
+            with app.app_context():
+                for label, terms in (('common term', COMMON), ('rare term', VOCABULARY)):
+                    samples = [
+                        timed(lambda: search_recipes(db.session, rng.randint(1, users), rng.choice(terms), 20))
+                        for _ in range(QUERIES)
+                    ]
+                    samples.sort()
+                    print(f"  {label:<12} p50 {statistics.median(samples):6.2f} ms"
+                          f"  p95 {samples[int(len(samples) * 0.95)]:6.2f} ms")
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100000, 1000000])
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Cold-start cost of a worker or test process.
+
+Times, in fresh interpreters, importing the app module, building the app
+with create_app() and serving the first request, under the testing config
+and under the development config against a migrated database file (what a
+production worker does). Run from the server directory:
+
+    python benchmarks/startup_bench.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+flask_app.test_client().get('/plants')
+served = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported, 'first_request': served - created}))
+"""
+
+MIGRATE = """
+from flask_migrate import upgrade
+import app
+with app.create_app().app_context():
+    upgrade()
+"""
+
+
+def probe(env, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], env=env, cwd=SERVER_DIR,
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {phase: statistics.median(sample[phase] for sample in samples) for phase in samples[0]}
+
+
+def main(runs=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        base = dict(os.environ, PYTHONPATH=SERVER_DIR, DATABASE_URL=database)
+        subprocess.run([sys.executable, '-c', MIGRATE], env=dict(base, APP_CONFIG='development', SKIP_SCHEMA_CHECK='1'),
+                       cwd=SERVER_DIR, check=True, capture_output=True)
+
+        print(f"{'config':<12} {'import ms':>10} {'create_app ms':>14} {'first request ms':>17}")
+        for config in ('testing', 'development'):
+            result = probe(dict(base, APP_CONFIG=config), runs)
+            print(f"{config:<12} {result['import'] * 1000:>10.1f} {result['create_app'] * 1000:>14.1f} "
+                  f"{result['first_request'] * 1000:>17.1f}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
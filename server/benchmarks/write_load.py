@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Concurrent POST /recipes load test against a file-backed SQLite database.
+
+Runs the same workload twice: once with SQLite's defaults (rollback journal,
+synchronous=FULL, no busy timeout beyond the driver's) and once with the
+tuned SQLITE_PRAGMAS, reporting committed writes per second and failures.
+Run from the server directory:
+
+    python benchmarks/write_load.py [threads] [posts_per_thread]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('APP_CONFIG', 'testing')
+
+from app import create_app  # noqa: E402
+from database import engine_options_from_env, sqlite_pragmas_from_env  # noqa: E402
+from models import db, User  # noqa: E402
+
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def run(pragmas, threads, posts, tmp):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options_from_env(os.environ),
+        'SQLITE_PRAGMAS': pragmas,
+        'PASSWORD_HASH_ITERATIONS': 1000,
+    })
+    with app.app_context():
+        user = User(username='loader')
+        user.password = 'password'
+        db.session.add(user)
+        db.session.commit()
+
+    statuses = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        client = app.test_client()
+        client.post('/login', json={'username': 'loader', 'password': 'password'})
+        barrier.wait()
+        for i in range(posts):
+            try:
+                response = client.post('/recipes', json={
+                    'title': f'Load {i}', 'instructions': 'Knead.', 'minutes_to_complete': i})
+                statuses.append(response.status_code)
+            except Exception:  # e.g. OperationalError: database is locked
+                statuses.append('error')
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    with app.app_context():
+        db.engine.dispose()
+    created = statuses.count(201)
+    return created / elapsed, len(statuses) - created
+
+
+def main(threads=8, posts=200):
+    for label, pragmas in (('sqlite defaults', DEFAULT_PRAGMAS),
+                           ('tuned pragmas', sqlite_pragmas_from_env(os.environ))):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate, failures = run(pragmas, threads, posts, tmp)
+        print(f"{label:<16} {rate:8.1f} writes/s  {failures} failed  ({threads} threads x {posts} posts)")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
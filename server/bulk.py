@@ -0,0 +1,60 @@
+import json
+
+from sqlalchemy import insert
+
+from models import Recipe
+from validation import InvalidRecipe, validate_recipe
+
+# Stands in for an NDJSON line that could not be parsed
+MALFORMED = object()
+
+
+def iter_ndjson(stream):
+    """Yields one parsed object per non-blank line without reading the whole body."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield MALFORMED
+
+
+def import_recipes(session, rows, user_id, batch_size, max_errors):
+    """Validates rows and inserts the valid ones in batches.
+
+    Each batch is a single executemany INSERT committed in its own transaction,
+    so only one batch of rows is held in memory at a time. At most max_errors
+    per-row errors are kept for the report; the rest are only counted.
+    """
+    created = 0
+    failed = 0
+    errors = []
+    batch = []
+
+    def flush():
+        session.execute(insert(Recipe), batch)
+        session.commit()
+        batch.clear()
+
+    for index, row in enumerate(rows):
+        try:
+            if row is MALFORMED:
+                raise InvalidRecipe("Malformed JSON.")
+            values = validate_recipe(row)
+        except InvalidRecipe as e:
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append({'row': index, 'error': str(e)})
+            continue
+
+        batch.append(dict(values, user_id=user_id))
+        if len(batch) >= batch_size:
+            created += len(batch)
+            flush()
+
+    if batch:
+        created += len(batch)
+        flush()
+
+    return {'created': created, 'failed': failed, 'errors': errors}
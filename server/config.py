@@ -1,37 +1,75 @@
-from flask import Flask
-from flask_bcrypt import Bcrypt
-from flask_migrate import Migrate
-from flask_restful import Api
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData
+import os
 
-class Config:
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///app.db'  # Default database URI for production
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = b'Y\xf1Xz\x00\xad|eQ\x80t \xca\x1a\x10K'  # Ensure this is kept secret
-    JSON_COMPACT = False
+from database import engine_options_from_env, replica_binds_from_env, sqlite_pragmas_from_env
 
-class TestingConfig(Config):
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for testing
+CONFIG_NAMES = ('development', 'production', 'testing')
 
-# Choose which configuration to use based on your environment
-app = Flask(__name__)
-app.config.from_object(TestingConfig)  # Change to Config for production
-app.secret_key = app.config['SECRET_KEY']
-app.json.compact = app.config['JSON_COMPACT']
 
-# Set up SQLAlchemy with a naming convention for foreign keys
-metadata = MetaData(naming_convention={
-    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
-})
-db = SQLAlchemy(metadata=metadata)
+def load_config(config_name=None, environ=None):
+    """Builds the app settings for an environment from environment variables.
 
-# Initialize Flask-Migrate and the database
-migrate = Migrate(app, db)
-db.init_app(app)
+    config_name defaults to APP_CONFIG, then 'development'. Nothing is read
+    until the app factory calls this, so importing the app does no I/O and
+    tests can change the environment between apps.
+    """
+    environ = os.environ if environ is None else environ
+    config_name = config_name or environ.get('APP_CONFIG', 'development')
+    if config_name not in CONFIG_NAMES:
+        raise ValueError(f"Unknown config {config_name!r}; expected one of {', '.join(CONFIG_NAMES)}.")
 
-# Initialize Flask-Bcrypt for password hashing
-bcrypt = Bcrypt(app)
+    binds = replica_binds_from_env(environ)
+    development = config_name == 'development'
+    config = {
+        'CONFIG_NAME': config_name,
+        'SECRET_KEY': environ.get('SECRET_KEY', 'your_secret_key'),
+        'SQLALCHEMY_DATABASE_URI': environ.get('DATABASE_URL', 'sqlite:///app.db'),
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options_from_env(environ),
+        'SQLALCHEMY_BINDS': binds,
+        'SQLALCHEMY_READ_REPLICAS': list(binds),  # Bind keys that serve reads
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SQLITE_PRAGMAS': sqlite_pragmas_from_env(environ),
+        'SKIP_SCHEMA_CHECK': bool(environ.get('SKIP_SCHEMA_CHECK')),
+        'JSON_COMPACT': environ.get('JSON_COMPACT', '1') != '0',  # Pretty-print only on request
+        'RECIPES_PAGE_SIZE': 100,  # Default page size for GET /recipes
+        'RECIPES_MAX_PAGE_SIZE': 1000,  # Upper bound for ?limit=
+        'RECIPES_BULK_BATCH_SIZE': 500,  # Rows per INSERT/commit in POST /recipes/bulk
+        'RECIPES_BULK_MAX_ERRORS': 100,  # Per-row errors reported before only counting
+        'RECIPES_EXPORT_BATCH_SIZE': 1000,  # Rows fetched per cursor round trip in /recipes/export
+        'RECIPES_SEARCH_WINDOW': 1000,  # Best-ranked matches /recipes/search pages through
+        'PASSWORD_HASH_METHOD': environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256'),
+        'PASSWORD_HASH_ITERATIONS': int(environ.get('PASSWORD_HASH_ITERATIONS', 260000)),
+        'PASSWORD_HASH_WORKERS': None,  # None uses one worker process per core
+        # Hashes in flight before /signup and /login get 503. None allows PASSWORD_HASH_PENDING_PER_WORKER
+        # per worker process; with inline hashing (0 workers) None means no cap beyond the request threads
+        'PASSWORD_HASH_MAX_PENDING': None,
+        'PASSWORD_HASH_PENDING_PER_WORKER': 4,
+        'SESSION_CACHE_SIZE': 10000,  # Sessions kept in the in-process LRU
+        'SESSION_CACHE_TTL': 60,  # Seconds before a cached session is re-read from the store
+        'RATELIMIT_ENABLED': environ.get('RATELIMIT_ENABLED', '1') != '0',
+        'RATELIMIT_PER_IP': (30, 60),  # /login and /signup attempts per client IP, per 60 seconds
+        'RATELIMIT_PER_USERNAME': (10, 60),  # Attempts against one username, from any IP
+        'RATELIMIT_MAX_KEYS': 100000,  # IPs and usernames tracked before evicting the least recent
+        # Reverse proxies in front of the app. Behind one, every request arrives from the
+        # proxy's address, so all clients would share one per-IP bucket; with this set the
+        # client address (and scheme) come from the last N X-Forwarded-For/-Proto entries.
+        # Leave it 0 when clients connect directly, or they can forge their address, and
+        # don't also enable the ASGI server's own proxy-header handling.
+        'TRUSTED_PROXIES': int(environ.get('TRUSTED_PROXIES', 0)),
+        'ASGI_MAX_BODY_SIZE': 1024 * 1024,  # Bytes buffered for an ASGI hot route; larger bodies get 413
+        # Per-request query counts and timings in a response header; they tell any client how
+        # the server spends its time, so they are opt-in outside development
+        'SERVER_TIMING': environ.get('SERVER_TIMING', '1' if development else '0') != '0',
+        # /metrics is served only to these client addresses, or to `Authorization: Bearer <METRICS_TOKEN>`
+        'METRICS_ALLOWED_IPS': tuple(ip.strip() for ip in environ.get(
+            'METRICS_ALLOWED_IPS', '127.0.0.1,::1' if development else '').split(',') if ip.strip()),
+        'METRICS_TOKEN': environ.get('METRICS_TOKEN') or None,
+    }
 
-# Set up Flask-Restful for API management
-api = Api(app)
+    if config_name == 'testing':
+        config.update({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',  # Use an in-memory database for tests
+            'SQLALCHEMY_ENGINE_OPTIONS': {},  # :memory: uses a single shared connection
+            'PASSWORD_HASH_WORKERS': 0,  # Hash inline; no worker processes in tests
+            'RATELIMIT_ENABLED': False,  # Tests log in far more often than a person would
+        })
+    return config
@@ -0,0 +1,62 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# asyncio DBAPI driver used for each backend in the ASGI mode
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite'}
+
+
+def sqlite_pragmas_from_env(environ):
+    """Per-connection SQLite settings tuned for many threads sharing one database file."""
+    return {
+        'journal_mode': environ.get('SQLITE_JOURNAL_MODE', 'WAL'),  # Readers no longer block the writer
+        'synchronous': environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),  # fsync at checkpoints, not every commit
+        'busy_timeout': int(environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),  # Wait for the write lock
+        'mmap_size': int(environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(environ.get('SQLITE_CACHE_SIZE', -64000)),  # Negative means KiB: 64 MB
+    }
+
+
+def engine_options_from_env(environ):
+    """Pool settings for file-backed databases; :memory: keeps Flask-SQLAlchemy's StaticPool."""
+    return {
+        'pool_size': int(environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 3600)),
+    }
+
+
+def replica_binds_from_env(environ):
+    """Builds SQLALCHEMY_BINDS entries from a comma-separated DATABASE_REPLICA_URLS.
+
+    A replica can also be the primary file opened read-only, e.g.
+    sqlite:///file:app.db?mode=ro&uri=true
+    """
+    urls = [url.strip() for url in environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    return {f'replica_{i}': url for i, url in enumerate(urls)}
+
+
+def async_database_url(url):
+    """Swaps a database URL's driver for its asyncio counterpart, e.g. sqlite -> sqlite+aiosqlite."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases.")
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise ValueError("An in-memory SQLite database is private to one engine; the async mode needs a file.")
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Runs the PRAGMAs on every new DBAPI connection the engine opens."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
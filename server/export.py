@@ -0,0 +1,34 @@
+import zlib
+
+from sqlalchemy import select
+
+from models import Recipe
+
+
+def iter_recipe_ndjson(session, user_id, since_id, batch_size, dumps_bytes):
+    """Yields a user's recipes with id > since_id as NDJSON, one chunk per batch.
+
+    yield_per streams rows from a server-side cursor, so only batch_size rows
+    are held in memory however many the user owns. Rows are ordered by id, so an
+    interrupted export resumes with since_id set to the last id received.
+    """
+    query = (
+        select(*[getattr(Recipe, field) for field in Recipe.SERIALIZABLE_FIELDS])
+        .where(Recipe.user_id == user_id, Recipe.id > since_id)
+        .order_by(Recipe.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = session.execute(query)
+    keys = list(result.keys())
+    for partition in result.partitions():
+        yield b''.join(dumps_bytes(dict(zip(keys, row))) + b'\n' for row in partition)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compresses a stream of byte chunks into a single gzip stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from instrumentation import record
+
+
+class HasherSaturated(Exception):
+    """Raised when more hashing work is pending than the pool is allowed to queue."""
+
+
+class HashMetrics:
+    """Latency histogram and counters for hash/verify calls."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self._operations = {}
+
+    def observe(self, operation, seconds):
+        with self._lock:
+            stats = self._operations.setdefault(
+                operation, {'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.BUCKETS)})
+            stats['count'] += 1
+            stats['sum'] += seconds
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        """Returns a copy of the counters that is safe to read without the lock."""
+        with self._lock:
+            return {
+                'rejected': self.rejected,
+                'operations': {
+                    operation: dict(stats, buckets=list(stats['buckets']))
+                    for operation, stats in self._operations.items()
+                },
+            }
+
+
+def pool_context():
+    """forkserver where the platform has it (Linux, macOS), else spawn; never a plain fork."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class PasswordHasher:
+    """Runs password hashing off the request thread, in a bounded process pool.
+
+    Hashing is CPU-bound and deliberately slow; running it in worker processes
+    lets it use every core instead of contending for the GIL with the request
+    threads. At most max_pending calls may be in flight, beyond which callers
+    get HasherSaturated (surfaced as a 503) instead of queueing indefinitely.
+    max_pending defaults to pending_per_worker calls per worker process.
+
+    With workers=0 hashing runs inline, which is what the tests use. Inline
+    hashes are already bounded by the server's request threads, so there
+    max_pending defaults to None, meaning no cap of its own.
+    """
+
+    def __init__(self, method='pbkdf2:sha256', iterations=260000, workers=None, max_pending=None,
+                 pending_per_worker=4):
+        self.method = f'{method}:{iterations}' if iterations else method
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        if max_pending is None and self.workers:
+            max_pending = self.workers * pending_per_worker
+        self.max_pending = max_pending
+        self.metrics = HashMetrics()
+        self._slots = threading.BoundedSemaphore(max_pending) if max_pending else None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            method=config['PASSWORD_HASH_METHOD'],
+            iterations=config['PASSWORD_HASH_ITERATIONS'],
+            workers=config['PASSWORD_HASH_WORKERS'],
+            max_pending=config['PASSWORD_HASH_MAX_PENDING'],
+            pending_per_worker=config['PASSWORD_HASH_PENDING_PER_WORKER'],
+        )
+
+    def _pool(self):
+        # Created on first use so that importing or building the app spawns nothing. By
+        # then the server is multithreaded, and forking it could copy a lock another
+        # thread holds into the child; workers come from a clean forkserver instead.
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context())
+        return self._executor
+
+    def _run(self, operation, fn, *args):
+        if self.max_pending is not None and not (self._slots and self._slots.acquire(blocking=False)):
+            self.metrics.reject()
+            raise HasherSaturated()
+        start = time.perf_counter()
+        try:
+            if not self.workers:
+                return fn(*args)
+            return self._pool().submit(fn, *args).result()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+            elapsed = time.perf_counter() - start
+            self.metrics.observe(operation, elapsed)
+            record('hash', elapsed)
+
+    def hash(self, password):
+        """Hashes the password with the configured method and cost."""
+        return self._run('hash', generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Checks the password against a stored hash of any supported method."""
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different method or cost than the current policy."""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# Used when models hash passwords outside of an application context, e.g. in scripts
+_default_hasher = PasswordHasher(workers=0)
+
+
+def current_hasher():
+    """Returns the app's configured hasher, or an inline default outside an app context."""
+    if has_app_context():
+        return current_app.extensions.get('password_hasher', _default_hasher)
+    return _default_hasher
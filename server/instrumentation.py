@@ -0,0 +1,205 @@
+import contextvars
+import threading
+import time
+
+from flask import request
+from sqlalchemy import event
+
+# Timings for the request being handled in this thread or task, or None outside one
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """What one request spent its time on, filled in as it runs."""
+
+    __slots__ = ('started', 'queries', 'db', 'hash', 'serialize')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.hash = 0.0
+        self.serialize = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Formats the timings as a Server-Timing header value, in milliseconds."""
+        return ', '.join((
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f'hash;dur={self.hash * 1000:.2f}',
+            f'serialize;dur={self.serialize * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+
+
+def start_request():
+    """Begins collecting timings for the current request; returns a token for finish_request()."""
+    return _current.set(RequestTimings())
+
+
+def current_timings():
+    return _current.get()
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def record(phase, seconds):
+    """Adds seconds to a phase ('hash' or 'serialize') of the current request, if there is one."""
+    timings = _current.get()
+    if timings is not None:
+        setattr(timings, phase, getattr(timings, phase) + seconds)
+
+
+def instrument_engine(engine):
+    """Counts and times every statement the engine runs on behalf of a request."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = _current.get()
+        started = conn.info.get('query_started')
+        if timings is not None and started:
+            timings.queries += 1
+            timings.db += time.perf_counter() - started.pop()
+
+
+class RequestMetrics:
+    """Per-route latency histograms and phase totals, rendered in the Prometheus text format."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._statuses = {}
+
+    def observe(self, method, route, status, seconds, timings):
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = {
+                    'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.BUCKETS),
+                    'queries': 0, 'db': 0.0, 'hash': 0.0, 'serialize': 0.0,
+                }
+            stats['count'] += 1
+            stats['sum'] += seconds
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+            stats['queries'] += timings.queries
+            stats['db'] += timings.db
+            stats['hash'] += timings.hash
+            stats['serialize'] += timings.serialize
+            key = (method, route, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def snapshot(self):
+        """Returns a copy of the counters that is safe to read without the lock."""
+        with self._lock:
+            return {
+                'routes': {key: dict(stats, buckets=list(stats['buckets']))
+                           for key, stats in self._routes.items()},
+                'statuses': dict(self._statuses),
+            }
+
+    def render(self, hash_metrics=None):
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP http_request_duration_seconds Time to build a response, by route.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (method, route), stats in sorted(snapshot['routes'].items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            lines.extend(_histogram('http_request_duration_seconds', labels, self.BUCKETS, stats))
+        lines += ['# HELP http_requests_total Responses sent, by route and status.',
+                  '# TYPE http_requests_total counter']
+        for (method, route, status), count in sorted(snapshot['statuses'].items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+        for name, field, help_text in (
+            ('http_request_db_queries_total', 'queries', 'SQL statements run, by route.'),
+            ('http_request_db_seconds_total', 'db', 'Time spent in the database, by route.'),
+            ('http_request_hash_seconds_total', 'hash', 'Time spent hashing passwords, by route.'),
+            ('http_request_serialize_seconds_total', 'serialize', 'Time spent encoding JSON, by route.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (method, route), stats in sorted(snapshot['routes'].items()):
+                lines.append(f'{name}{{method="{method}",route="{_escape(route)}"}} {stats[field]}')
+
+        if hash_metrics is not None:
+            hashes = hash_metrics.snapshot()
+            lines += ['# HELP password_hash_duration_seconds Time to hash or verify a password.',
+                      '# TYPE password_hash_duration_seconds histogram']
+            for operation, stats in sorted(hashes['operations'].items()):
+                lines.extend(_histogram('password_hash_duration_seconds', f'operation="{operation}"',
+                                        hash_metrics.BUCKETS, stats))
+            lines += ['# HELP password_hash_rejected_total Hash calls refused because the pool was saturated.',
+                      '# TYPE password_hash_rejected_total counter',
+                      f"password_hash_rejected_total {hashes['rejected']}"]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _histogram(name, labels, bounds, stats):
+    # Bucket counts are already cumulative: an observation lands in every bucket it fits
+    for bound, count in zip(bounds, stats['buckets']):
+        yield f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+    yield f'{name}_bucket{{{labels},le="+Inf"}} {stats["count"]}'
+    yield f'{name}_sum{{{labels}}} {stats["sum"]}'
+    yield f'{name}_count{{{labels}}} {stats["count"]}'
+
+
+def instrument_app(app):
+    """Times every request, adds a Server-Timing header and records per-route metrics."""
+    metrics = app.extensions['request_metrics'] = RequestMetrics()
+
+    @app.before_request
+    def start_timing():
+        start_request()
+
+    @app.after_request
+    def finish_timing(response):
+        timings = _current.get()
+        if timings is not None:
+            # Unmatched paths share one label, so scanners can't grow the metric set without bound
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            observe_response(app, request.method, route, response, timings)
+            if response.is_streamed:
+                # Queries made while the body streams still belong to this request
+                response.response = _stop_timing_after(response.response)
+            else:
+                _current.set(None)
+        return response
+
+    @app.teardown_request
+    def stop_timing(exc):
+        # Teardown can run outside the context the request was handled in (e.g. when a
+        # test client preserves it), so clear the timings rather than resetting a token
+        _current.set(None)
+
+    return metrics
+
+
+def _stop_timing_after(iterable):
+    try:
+        yield from iterable
+    finally:
+        _current.set(None)
+
+
+def observe_response(app, method, route, response, timings):
+    """Records a finished request and, if enabled, exposes its timings on the response."""
+    total = timings.elapsed()
+    app.extensions['request_metrics'].observe(method, route, response.status_code, total, timings)
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = timings.server_timing(total)
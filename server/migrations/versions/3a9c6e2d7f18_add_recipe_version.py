@@ -0,0 +1,26 @@
+"""Add recipe version
+
+Revision ID: 3a9c6e2d7f18
+Revises: 7d3f1b8e4a62
+Create Date: 2026-10-16 20:03:41.552907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9c6e2d7f18'
+down_revision = '7d3f1b8e4a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A constant default, so SQLite adds the column without rewriting the table
+    op.add_column('recipe', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    # Not a batch operation: recreating recipe would drop its ETag, FTS and stats triggers
+    op.execute('ALTER TABLE recipe DROP COLUMN version')
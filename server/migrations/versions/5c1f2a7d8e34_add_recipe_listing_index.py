@@ -0,0 +1,26 @@
+"""Add recipe listing index
+
+Revision ID: 5c1f2a7d8e34
+Revises: 9438888a591d
+Create Date: 2026-10-16 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1f2a7d8e34'
+down_revision = '9438888a591d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user recipe listing: WHERE user_id = ? AND id > ? ORDER BY id.
+    # Username lookups are already served by the unique constraint's index.
+    op.create_index('ix_recipe_user_id_id', 'recipes', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recipe_user_id_id', table_name='recipes')
@@ -0,0 +1,88 @@
+"""Add user recipe stats
+
+Revision ID: 7d3f1b8e4a62
+Revises: e5a2c8f4b017
+Create Date: 2026-10-16 19:12:05.318842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f1b8e4a62'
+down_revision = 'e5a2c8f4b017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_recipe_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('recipe_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('minutes_total', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('min_minutes', sa.Integer(), nullable=True),
+    sa.Column('max_minutes', sa.Integer(), nullable=True),
+    sa.Column('latest_recipe_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute("""CREATE TRIGGER recipe_stats_after_insert AFTER INSERT ON recipe BEGIN
+        INSERT INTO user_recipe_stats (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        VALUES (NEW.user_id, 1, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            minutes_total = minutes_total + excluded.minutes_total,
+            min_minutes = min(coalesce(min_minutes, excluded.min_minutes), excluded.min_minutes),
+            max_minutes = max(coalesce(max_minutes, excluded.max_minutes), excluded.max_minutes),
+            latest_recipe_id = max(coalesce(latest_recipe_id, excluded.latest_recipe_id), excluded.latest_recipe_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_stats_after_delete AFTER DELETE ON recipe BEGIN
+        UPDATE user_recipe_stats SET
+            recipe_count = recipe_count - 1,
+            minutes_total = minutes_total - OLD.minutes_to_complete,
+            min_minutes = CASE WHEN OLD.minutes_to_complete > min_minutes THEN min_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete LIMIT 1) END,
+            max_minutes = CASE WHEN OLD.minutes_to_complete < max_minutes THEN max_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete DESC LIMIT 1) END,
+            latest_recipe_id = CASE WHEN OLD.id < latest_recipe_id THEN latest_recipe_id ELSE (
+                SELECT id FROM recipe WHERE user_id = OLD.user_id ORDER BY id DESC LIMIT 1) END
+        WHERE user_id = OLD.user_id;
+    END""")
+    op.execute("""CREATE TRIGGER recipe_stats_after_update AFTER UPDATE OF minutes_to_complete, user_id ON recipe BEGIN
+        UPDATE user_recipe_stats SET
+            recipe_count = recipe_count - 1,
+            minutes_total = minutes_total - OLD.minutes_to_complete,
+            min_minutes = CASE WHEN OLD.minutes_to_complete > min_minutes THEN min_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete LIMIT 1) END,
+            max_minutes = CASE WHEN OLD.minutes_to_complete < max_minutes THEN max_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete DESC LIMIT 1) END,
+            latest_recipe_id = CASE WHEN OLD.id < latest_recipe_id THEN latest_recipe_id ELSE (
+                SELECT id FROM recipe WHERE user_id = OLD.user_id ORDER BY id DESC LIMIT 1) END
+        WHERE user_id = OLD.user_id;
+        INSERT INTO user_recipe_stats (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        VALUES (NEW.user_id, 1, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            minutes_total = minutes_total + excluded.minutes_total,
+            min_minutes = min(coalesce(min_minutes, excluded.min_minutes), excluded.min_minutes),
+            max_minutes = max(coalesce(max_minutes, excluded.max_minutes), excluded.max_minutes),
+            latest_recipe_id = max(coalesce(latest_recipe_id, excluded.latest_recipe_id), excluded.latest_recipe_id);
+    END""")
+    # Summarize the recipes that already exist
+    op.execute("""INSERT INTO user_recipe_stats
+        (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        SELECT user_id, count(*), sum(minutes_to_complete), min(minutes_to_complete),
+               max(minutes_to_complete), max(id)
+        FROM recipe GROUP BY user_id""")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER recipe_stats_after_update")
+    op.execute("DROP TRIGGER recipe_stats_after_delete")
+    op.execute("DROP TRIGGER recipe_stats_after_insert")
+    op.drop_table('user_recipe_stats')
@@ -0,0 +1,118 @@
+"""Never reuse recipe ids
+
+Revision ID: 8e2b4f6a1c93
+Revises: 3a9c6e2d7f18
+Create Date: 2026-10-17 10:21:37.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2b4f6a1c93'
+down_revision = '3a9c6e2d7f18'
+branch_labels = None
+depends_on = None
+
+# Recreating recipe drops its triggers, and SQLite won't rename the new table
+# into place while a view still refers to the old one
+DEPENDENTS = (
+    'recipe_version_after_insert', 'recipe_version_after_update', 'recipe_version_after_delete',
+    'recipe_fts_content', 'recipe_fts_after_insert', 'recipe_fts_after_delete', 'recipe_fts_after_update',
+    'recipe_stats_after_insert', 'recipe_stats_after_delete', 'recipe_stats_after_update',
+)
+
+
+def drop_dependents():
+    for name in reversed(DEPENDENTS):
+        op.execute(f"DROP {'VIEW' if name == 'recipe_fts_content' else 'TRIGGER'} {name}")
+
+
+def create_dependents():
+    op.execute("""CREATE TRIGGER recipe_version_after_insert AFTER INSERT ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id = NEW.user_id;
+    END""")
+    op.execute("""CREATE TRIGGER recipe_version_after_update AFTER UPDATE ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_version_after_delete AFTER DELETE ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id = OLD.user_id;
+    END""")
+    op.execute("""CREATE VIEW IF NOT EXISTS recipe_fts_content AS
+        SELECT id, title, instructions, 'u' || user_id AS owner FROM recipe""")
+    op.execute("""CREATE TRIGGER recipe_fts_after_insert AFTER INSERT ON recipe BEGIN
+        INSERT INTO recipe_fts(rowid, title, instructions, owner)
+        VALUES (NEW.id, NEW.title, NEW.instructions, 'u' || NEW.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_fts_after_delete AFTER DELETE ON recipe BEGIN
+        INSERT INTO recipe_fts(recipe_fts, rowid, title, instructions, owner)
+        VALUES ('delete', OLD.id, OLD.title, OLD.instructions, 'u' || OLD.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_fts_after_update AFTER UPDATE OF title, instructions, user_id ON recipe BEGIN
+        INSERT INTO recipe_fts(recipe_fts, rowid, title, instructions, owner)
+        VALUES ('delete', OLD.id, OLD.title, OLD.instructions, 'u' || OLD.user_id);
+        INSERT INTO recipe_fts(rowid, title, instructions, owner)
+        VALUES (NEW.id, NEW.title, NEW.instructions, 'u' || NEW.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_stats_after_insert AFTER INSERT ON recipe BEGIN
+        INSERT INTO user_recipe_stats (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        VALUES (NEW.user_id, 1, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            minutes_total = minutes_total + excluded.minutes_total,
+            min_minutes = min(coalesce(min_minutes, excluded.min_minutes), excluded.min_minutes),
+            max_minutes = max(coalesce(max_minutes, excluded.max_minutes), excluded.max_minutes),
+            latest_recipe_id = max(coalesce(latest_recipe_id, excluded.latest_recipe_id), excluded.latest_recipe_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_stats_after_delete AFTER DELETE ON recipe BEGIN
+        UPDATE user_recipe_stats SET
+            recipe_count = recipe_count - 1,
+            minutes_total = minutes_total - OLD.minutes_to_complete,
+            min_minutes = CASE WHEN OLD.minutes_to_complete > min_minutes THEN min_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete LIMIT 1) END,
+            max_minutes = CASE WHEN OLD.minutes_to_complete < max_minutes THEN max_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete DESC LIMIT 1) END,
+            latest_recipe_id = CASE WHEN OLD.id < latest_recipe_id THEN latest_recipe_id ELSE (
+                SELECT id FROM recipe WHERE user_id = OLD.user_id ORDER BY id DESC LIMIT 1) END
+        WHERE user_id = OLD.user_id;
+    END""")
+    op.execute("""CREATE TRIGGER recipe_stats_after_update AFTER UPDATE OF minutes_to_complete, user_id ON recipe BEGIN
+        UPDATE user_recipe_stats SET
+            recipe_count = recipe_count - 1,
+            minutes_total = minutes_total - OLD.minutes_to_complete,
+            min_minutes = CASE WHEN OLD.minutes_to_complete > min_minutes THEN min_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete LIMIT 1) END,
+            max_minutes = CASE WHEN OLD.minutes_to_complete < max_minutes THEN max_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete DESC LIMIT 1) END,
+            latest_recipe_id = CASE WHEN OLD.id < latest_recipe_id THEN latest_recipe_id ELSE (
+                SELECT id FROM recipe WHERE user_id = OLD.user_id ORDER BY id DESC LIMIT 1) END
+        WHERE user_id = OLD.user_id;
+        INSERT INTO user_recipe_stats (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        VALUES (NEW.user_id, 1, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            minutes_total = minutes_total + excluded.minutes_total,
+            min_minutes = min(coalesce(min_minutes, excluded.min_minutes), excluded.min_minutes),
+            max_minutes = max(coalesce(max_minutes, excluded.max_minutes), excluded.max_minutes),
+            latest_recipe_id = max(coalesce(latest_recipe_id, excluded.latest_recipe_id), excluded.latest_recipe_id);
+    END""")
+
+
+def upgrade():
+    drop_dependents()
+    # Existing rows keep their ids, and copying them in starts sqlite_sequence at the current max
+    with op.batch_alter_table('recipe', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    create_dependents()
+
+
+def downgrade():
+    drop_dependents()
+    with op.batch_alter_table('recipe', recreate='always'):
+        pass
+    create_dependents()
@@ -0,0 +1,37 @@
+"""Align schema with models
+
+Revision ID: a83e0c41b9f2
+Revises: 5c1f2a7d8e34
+Create Date: 2026-10-16 10:03:27.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83e0c41b9f2'
+down_revision = '5c1f2a7d8e34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # models.py is the source of truth: singular table names, 500-char bio/image_url
+    op.rename_table('users', 'user')
+    op.rename_table('recipes', 'recipe')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('image_url', existing_type=sa.String(length=250),
+                              type_=sa.String(length=500), existing_nullable=True)
+        batch_op.alter_column('bio', existing_type=sa.String(length=250),
+                              type_=sa.String(length=500), existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('bio', existing_type=sa.String(length=500),
+                              type_=sa.String(length=250), existing_nullable=True)
+        batch_op.alter_column('image_url', existing_type=sa.String(length=500),
+                              type_=sa.String(length=250), existing_nullable=True)
+    op.rename_table('recipe', 'recipes')
+    op.rename_table('user', 'users')
@@ -0,0 +1,39 @@
+"""Add per-user recipes_version maintained by triggers
+
+Revision ID: b6e1d3f9a274
+Revises: f2c8a5d1e7b3
+Create Date: 2026-10-16 14:05:31.908112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1d3f9a274'
+down_revision = 'f2c8a5d1e7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recipes_version', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""CREATE TRIGGER recipe_version_after_insert AFTER INSERT ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id = NEW.user_id;
+    END""")
+    op.execute("""CREATE TRIGGER recipe_version_after_update AFTER UPDATE ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_version_after_delete AFTER DELETE ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id = OLD.user_id;
+    END""")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER recipe_version_after_delete")
+    op.execute("DROP TRIGGER recipe_version_after_update")
+    op.execute("DROP TRIGGER recipe_version_after_insert")
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('recipes_version')
@@ -0,0 +1,47 @@
+"""Add recipe full-text search
+
+Revision ID: c93a7e2b58d1
+Revises: b6e1d3f9a274
+Create Date: 2026-10-16 15:22:48.417306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c93a7e2b58d1'
+down_revision = 'b6e1d3f9a274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIEW IF NOT EXISTS recipe_fts_content AS
+        SELECT id, title, instructions, 'u' || user_id AS owner FROM recipe""")
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS recipe_fts USING fts5(
+        title, instructions, owner, content='recipe_fts_content', content_rowid='id')""")
+    op.execute("""CREATE TRIGGER recipe_fts_after_insert AFTER INSERT ON recipe BEGIN
+        INSERT INTO recipe_fts(rowid, title, instructions, owner)
+        VALUES (NEW.id, NEW.title, NEW.instructions, 'u' || NEW.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_fts_after_delete AFTER DELETE ON recipe BEGIN
+        INSERT INTO recipe_fts(recipe_fts, rowid, title, instructions, owner)
+        VALUES ('delete', OLD.id, OLD.title, OLD.instructions, 'u' || OLD.user_id);
+    END""")
+    op.execute("""CREATE TRIGGER recipe_fts_after_update AFTER UPDATE OF title, instructions, user_id ON recipe BEGIN
+        INSERT INTO recipe_fts(recipe_fts, rowid, title, instructions, owner)
+        VALUES ('delete', OLD.id, OLD.title, OLD.instructions, 'u' || OLD.user_id);
+        INSERT INTO recipe_fts(rowid, title, instructions, owner)
+        VALUES (NEW.id, NEW.title, NEW.instructions, 'u' || NEW.user_id);
+    END""")
+    # Index the recipes that already exist
+    op.execute("INSERT INTO recipe_fts(recipe_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER recipe_fts_after_update")
+    op.execute("DROP TRIGGER recipe_fts_after_delete")
+    op.execute("DROP TRIGGER recipe_fts_after_insert")
+    op.execute("DROP TABLE recipe_fts")
+    op.execute("DROP VIEW recipe_fts_content")
@@ -0,0 +1,28 @@
+"""Widen password hash column
+
+Revision ID: d4b7e9a2c615
+Revises: a83e0c41b9f2
+Create Date: 2026-10-16 11:20:54.302117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b7e9a2c615'
+down_revision = 'a83e0c41b9f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('_password_hash', existing_type=sa.String(length=128),
+                              type_=sa.String(length=255), existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('_password_hash', existing_type=sa.String(length=255),
+                              type_=sa.String(length=128), existing_nullable=False)
@@ -0,0 +1,27 @@
+"""Add recipe sort indexes
+
+Revision ID: e5a2c8f4b017
+Revises: c93a7e2b58d1
+Create Date: 2026-10-16 16:40:12.730554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a2c8f4b017'
+down_revision = 'c93a7e2b58d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One index per GET /recipes sort key; each also serves the range filter on its column
+    op.create_index('ix_recipe_user_id_minutes', 'recipe', ['user_id', 'minutes_to_complete', 'id'], unique=False)
+    op.create_index('ix_recipe_user_id_title', 'recipe', ['user_id', 'title', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recipe_user_id_title', table_name='recipe')
+    op.drop_index('ix_recipe_user_id_minutes', table_name='recipe')
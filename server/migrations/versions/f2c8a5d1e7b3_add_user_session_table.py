@@ -0,0 +1,35 @@
+"""Add user_session table
+
+Revision ID: f2c8a5d1e7b3
+Revises: d4b7e9a2c615
+Create Date: 2026-10-16 12:41:09.664381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a5d1e7b3'
+down_revision = 'd4b7e9a2c615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_session',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_session_expires_at'), 'user_session', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_user_session_user_id'), 'user_session', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_user_session_user_id'), table_name='user_session')
+    op.drop_index(op.f('ix_user_session_expires_at'), table_name='user_session')
+    op.drop_table('user_session')
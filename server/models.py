@@ -1,15 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DDL, event
+from hashing import current_hasher
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'user'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    _password_hash = db.Column(db.String(128), nullable=False)
+    _password_hash = db.Column(db.String(255), nullable=False)
     bio = db.Column(db.String(500), nullable=True)  # Explicitly set nullable=True
     image_url = db.Column(db.String(500), nullable=True)  # Explicitly set nullable=True
+    # Bumped by triggers on every recipe insert/update/delete; backs the GET /recipes ETag
+    recipes_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Columns embedded as a recipe's author by GET /recipes?include=user
+    AUTHOR_FIELDS = ('id', 'username', 'image_url')
 
     @property
     def password(self):
@@ -18,29 +25,159 @@ class User(db.Model):
     @password.setter
     def password(self, password):
         """Hashes the password and stores it."""
-        self._password_hash = generate_password_hash(password)
+        self._password_hash = current_hasher().hash(password)
 
     def verify_password(self, password):
         """Verifies the provided password against the stored hash."""
-        return check_password_hash(self._password_hash, password)
+        return current_hasher().verify(self._password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash predates the current hashing policy."""
+        return current_hasher().needs_rehash(self._password_hash)
 
 class Recipe(db.Model):
     __tablename__ = 'recipe'
+    __table_args__ = (
+        # Serves GET /recipes: equality on user_id, keyset range and ORDER BY on id
+        db.Index('ix_recipe_user_id_id', 'user_id', 'id'),
+        # Serve GET /recipes?sort=[-]minutes_to_complete and ?sort=[-]title with their range filters
+        db.Index('ix_recipe_user_id_minutes', 'user_id', 'minutes_to_complete', 'id'),
+        db.Index('ix_recipe_user_id_title', 'user_id', 'title', 'id'),
+        # Never reuse the id of a deleted recipe, so (id, version) ETags can't match a newer recipe
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     instructions = db.Column(db.Text, nullable=False)
     minutes_to_complete = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Incremented by every PATCH /recipes/<id>; the recipe's ETag, checked against If-Match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     # Relationship to link Recipe to User
     user = db.relationship('User', backref='recipes')
 
+    # Columns exposed by to_dict() and selectable through GET /recipes?fields=
+    SERIALIZABLE_FIELDS = ('id', 'title', 'instructions', 'minutes_to_complete', 'user_id')
+
     def to_dict(self):
         """Convert the Recipe object to a dictionary for JSON serialization."""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'instructions': self.instructions,
-            'minutes_to_complete': self.minutes_to_complete,
-            'user_id': self.user_id
-        }
+        return {field: getattr(self, field) for field in self.SERIALIZABLE_FIELDS}
+
+# Triggers rather than ORM events, so Core bulk inserts and deletes bump the version too.
+# The migrations create the same triggers.
+RECIPE_VERSION_TRIGGERS = (
+    """CREATE TRIGGER recipe_version_after_insert AFTER INSERT ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id = NEW.user_id;
+    END""",
+    """CREATE TRIGGER recipe_version_after_update AFTER UPDATE ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+    END""",
+    """CREATE TRIGGER recipe_version_after_delete AFTER DELETE ON recipe BEGIN
+        UPDATE "user" SET recipes_version = recipes_version + 1 WHERE id = OLD.user_id;
+    END""",
+)
+for trigger in RECIPE_VERSION_TRIGGERS:
+    event.listen(Recipe.__table__, 'after_create', DDL(trigger).execute_if(dialect='sqlite'))
+
+# Full-text index over recipe titles and instructions. The owner column holds a
+# "u<user_id>" token so per-user searches intersect posting lists instead of
+# ranking every user's matches. The view supplies it as external content.
+RECIPE_FTS_DDL = (
+    """CREATE VIEW IF NOT EXISTS recipe_fts_content AS
+        SELECT id, title, instructions, 'u' || user_id AS owner FROM recipe""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS recipe_fts USING fts5(
+        title, instructions, owner, content='recipe_fts_content', content_rowid='id')""",
+    """CREATE TRIGGER recipe_fts_after_insert AFTER INSERT ON recipe BEGIN
+        INSERT INTO recipe_fts(rowid, title, instructions, owner)
+        VALUES (NEW.id, NEW.title, NEW.instructions, 'u' || NEW.user_id);
+    END""",
+    """CREATE TRIGGER recipe_fts_after_delete AFTER DELETE ON recipe BEGIN
+        INSERT INTO recipe_fts(recipe_fts, rowid, title, instructions, owner)
+        VALUES ('delete', OLD.id, OLD.title, OLD.instructions, 'u' || OLD.user_id);
+    END""",
+    """CREATE TRIGGER recipe_fts_after_update AFTER UPDATE OF title, instructions, user_id ON recipe BEGIN
+        INSERT INTO recipe_fts(recipe_fts, rowid, title, instructions, owner)
+        VALUES ('delete', OLD.id, OLD.title, OLD.instructions, 'u' || OLD.user_id);
+        INSERT INTO recipe_fts(rowid, title, instructions, owner)
+        VALUES (NEW.id, NEW.title, NEW.instructions, 'u' || NEW.user_id);
+    END""",
+)
+for statement in RECIPE_FTS_DDL:
+    event.listen(Recipe.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in ('DROP TABLE IF EXISTS recipe_fts', 'DROP VIEW IF EXISTS recipe_fts_content'):
+    event.listen(Recipe.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+
+class UserRecipeStats(db.Model):
+    """Per-user recipe summary behind GET /users/me/stats, maintained by the triggers below."""
+    __tablename__ = 'user_recipe_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    recipe_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # The average is minutes_total / recipe_count; a running sum survives deletes, an average doesn't
+    minutes_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    min_minutes = db.Column(db.Integer, nullable=True)
+    max_minutes = db.Column(db.Integer, nullable=True)
+    latest_recipe_id = db.Column(db.Integer, nullable=True)
+
+# Inserts fold the new row into the summary. Deletes subtract it, and only when it
+# held the min, max or latest do they look up the replacement, with an ORDER BY ...
+# LIMIT 1 that is a single seek into ix_recipe_user_id_minutes or ix_recipe_user_id_id.
+# An update is a delete from the old owner followed by an insert for the new one.
+# The migrations create the same triggers; stats.rebuild_recipe_stats() backfills.
+RECIPE_STATS_TRIGGERS = (
+    """CREATE TRIGGER recipe_stats_after_insert AFTER INSERT ON recipe BEGIN
+        INSERT INTO user_recipe_stats (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        VALUES (NEW.user_id, 1, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            minutes_total = minutes_total + excluded.minutes_total,
+            min_minutes = min(coalesce(min_minutes, excluded.min_minutes), excluded.min_minutes),
+            max_minutes = max(coalesce(max_minutes, excluded.max_minutes), excluded.max_minutes),
+            latest_recipe_id = max(coalesce(latest_recipe_id, excluded.latest_recipe_id), excluded.latest_recipe_id);
+    END""",
+    """CREATE TRIGGER recipe_stats_after_delete AFTER DELETE ON recipe BEGIN
+        UPDATE user_recipe_stats SET
+            recipe_count = recipe_count - 1,
+            minutes_total = minutes_total - OLD.minutes_to_complete,
+            min_minutes = CASE WHEN OLD.minutes_to_complete > min_minutes THEN min_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete LIMIT 1) END,
+            max_minutes = CASE WHEN OLD.minutes_to_complete < max_minutes THEN max_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete DESC LIMIT 1) END,
+            latest_recipe_id = CASE WHEN OLD.id < latest_recipe_id THEN latest_recipe_id ELSE (
+                SELECT id FROM recipe WHERE user_id = OLD.user_id ORDER BY id DESC LIMIT 1) END
+        WHERE user_id = OLD.user_id;
+    END""",
+    """CREATE TRIGGER recipe_stats_after_update AFTER UPDATE OF minutes_to_complete, user_id ON recipe BEGIN
+        UPDATE user_recipe_stats SET
+            recipe_count = recipe_count - 1,
+            minutes_total = minutes_total - OLD.minutes_to_complete,
+            min_minutes = CASE WHEN OLD.minutes_to_complete > min_minutes THEN min_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete LIMIT 1) END,
+            max_minutes = CASE WHEN OLD.minutes_to_complete < max_minutes THEN max_minutes ELSE (
+                SELECT minutes_to_complete FROM recipe WHERE user_id = OLD.user_id
+                ORDER BY minutes_to_complete DESC LIMIT 1) END,
+            latest_recipe_id = CASE WHEN OLD.id < latest_recipe_id THEN latest_recipe_id ELSE (
+                SELECT id FROM recipe WHERE user_id = OLD.user_id ORDER BY id DESC LIMIT 1) END
+        WHERE user_id = OLD.user_id;
+        INSERT INTO user_recipe_stats (user_id, recipe_count, minutes_total, min_minutes, max_minutes, latest_recipe_id)
+        VALUES (NEW.user_id, 1, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.minutes_to_complete, NEW.id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            minutes_total = minutes_total + excluded.minutes_total,
+            min_minutes = min(coalesce(min_minutes, excluded.min_minutes), excluded.min_minutes),
+            max_minutes = max(coalesce(max_minutes, excluded.max_minutes), excluded.max_minutes),
+            latest_recipe_id = max(coalesce(latest_recipe_id, excluded.latest_recipe_id), excluded.latest_recipe_id);
+    END""",
+)
+for trigger in RECIPE_STATS_TRIGGERS:
+    event.listen(Recipe.__table__, 'after_create', DDL(trigger).execute_if(dialect='sqlite'))
+
+class UserSession(db.Model):
+    __tablename__ = 'user_session'
+    id = db.Column(db.String(64), primary_key=True)  # Random token carried in the session cookie
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,98 @@
+import base64
+import binascii
+import json
+
+
+# SQLite integers are signed 64-bit; Python ints outside this range can't even be bound
+MIN_INTEGER = -2 ** 63
+MAX_INTEGER = 2 ** 63 - 1
+
+
+class InvalidQuery(ValueError):
+    """Raised when list query parameters (cursor, limit, fields) are malformed."""
+
+
+def is_integer(value):
+    """True for an int that fits a SQLite INTEGER; bool is an int subclass but never a key."""
+    return isinstance(value, int) and not isinstance(value, bool) and MIN_INTEGER <= value <= MAX_INTEGER
+
+
+def is_text(value):
+    """True for a str SQLite can store; JSON escapes can smuggle in lone surrogates."""
+    if not isinstance(value, str):
+        return False
+    try:
+        value.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def parse_integer(raw, name):
+    """Parses an integer query parameter, rejecting anything a SQLite INTEGER can't hold."""
+    try:
+        value = int(raw)
+    except ValueError:
+        raise InvalidQuery(f"{name} must be an integer.")
+    if not is_integer(value):
+        raise InvalidQuery(f"{name} is out of range.")
+    return value
+
+
+def encode_cursor(values):
+    """Encodes the keyset position of the last row on a page as an opaque token."""
+    payload = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decodes a token produced by encode_cursor back into its keyset values."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidQuery("Invalid cursor.")
+    if not isinstance(values, dict):
+        raise InvalidQuery("Invalid cursor.")
+    return values
+
+
+def parse_limit(raw, default, maximum):
+    """Parses the ?limit= parameter, falling back to default and capping at maximum."""
+    if raw is None:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise InvalidQuery("limit must be an integer.")
+    if limit < 1:
+        raise InvalidQuery("limit must be positive.")
+    return min(limit, maximum)
+
+
+def parse_fields(raw, allowed):
+    """Parses the ?fields= projection. The id column is always included."""
+    if not raw:
+        return list(allowed)
+    fields = ['id']
+    for name in raw.split(','):
+        name = name.strip()
+        if name not in allowed:
+            raise InvalidQuery(f"Unknown field: {name}.")
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+
+def parse_include(raw, allowed):
+    """Parses the ?include= list of related objects to embed."""
+    if not raw:
+        return []
+    include = []
+    for name in raw.split(','):
+        name = name.strip()
+        if name not in allowed:
+            raise InvalidQuery(f"Cannot include {name}.")
+        if name not in include:
+            include.append(name)
+    return include
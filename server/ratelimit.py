@@ -0,0 +1,92 @@
+import math
+import threading
+import time
+
+from cache import LRUCache
+
+
+class RateLimited(Exception):
+    """Raised when a client has used up its requests; retry_after is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class RateLimitBackend:
+    """Storage for token buckets.
+
+    take() removes one token from the bucket at key, which holds at most
+    capacity tokens and refills at rate tokens per second. It returns 0 if a
+    token was taken, otherwise the seconds until one will be available.
+    Subclass this to share buckets between processes.
+    """
+
+    def take(self, key, rate, capacity):
+        raise NotImplementedError
+
+    def reset(self, key):
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """Keeps buckets in an in-process LRU.
+
+    Memory is bounded by max_keys however many IPs or usernames are seen. A
+    bucket is dropped once it would have refilled completely, and evicting one
+    early only gives that key a full bucket again.
+    """
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = LRUCache(max_keys, clock=clock)
+
+    def take(self, key, rate, capacity):
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / rate)
+                return (1 - tokens) / rate
+            self._buckets.set(key, (tokens - 1, now), ttl=(capacity - tokens + 1) / rate)
+            return 0
+
+    def reset(self, key):
+        self._buckets.delete(key)
+
+
+class RateLimiter:
+    """Token-bucket limits for the auth routes, checked before any hashing or queries.
+
+    limits maps a scope such as 'ip' or 'username' to (requests, per_seconds);
+    a client may burst up to requests at once, then gets one more every
+    per_seconds / requests seconds.
+    """
+
+    def __init__(self, backend, limits):
+        self.backend = backend
+        self.limits = limits
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(MemoryBackend(config['RATELIMIT_MAX_KEYS']), {
+            'ip': config['RATELIMIT_PER_IP'],
+            'username': config['RATELIMIT_PER_USERNAME'],
+        })
+
+    def hit(self, **keys):
+        """Takes a token for each scope given, e.g. hit(ip=..., username=...).
+
+        Scopes are checked in order and a refused one stops the rest, so a
+        client already blocked by IP doesn't also drain the username's bucket.
+        Raises RateLimited with the whole seconds to wait.
+        """
+        for scope, value in keys.items():
+            if value is None or scope not in self.limits:
+                continue
+            requests, per_seconds = self.limits[scope]
+            wait = self.backend.take(f'{scope}:{value}', requests / per_seconds, requests)
+            if wait:
+                raise RateLimited(max(1, math.ceil(wait)))
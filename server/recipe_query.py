@@ -0,0 +1,156 @@
+import hashlib
+
+from sqlalchemy import select, tuple_
+
+from models import Recipe, User
+from pagination import (InvalidQuery, decode_cursor, encode_cursor, is_integer, is_text, parse_fields, parse_include,
+                        parse_integer, parse_limit)
+
+# Each sort key, its column, and the filters that key's (user_id, <column>, id)
+# index can serve as a range within one user's rows
+SORTS = {
+    'id': (Recipe.id, ()),
+    'minutes_to_complete': (Recipe.minutes_to_complete, ('min_minutes', 'max_minutes')),
+    'title': (Recipe.title, ('title_prefix',)),
+}
+FILTERS = {
+    'min_minutes': 'minutes_to_complete',
+    'max_minutes': 'minutes_to_complete',
+    'title_prefix': 'title',
+}
+
+
+def prefix_upper_bound(prefix):
+    """Returns the smallest string above every string starting with prefix, or None if there is none.
+
+    SQLite compares text as UTF-8 bytes, i.e. by code point, so incrementing
+    the last code point works except at the edges: surrogates can't be
+    encoded and are skipped, and a trailing U+10FFFF has no successor, so it
+    is dropped and the character before it incremented instead.
+    """
+    prefix = prefix.rstrip('\U0010ffff')
+    if not prefix:
+        return None  # Only U+10FFFF characters: the range is open-ended
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return prefix[:-1] + chr(following)
+
+
+class RecipeListQuery:
+    """The GET /recipes parameters, restricted to what an index can serve.
+
+    Sorting by id, minutes_to_complete or title (prefix with - for descending)
+    walks ix_recipe_user_id_id, ix_recipe_user_id_minutes or
+    ix_recipe_user_id_title respectively, and a filter is only accepted on the
+    column being sorted by. Combinations that would need a scan or a separate
+    sort step, such as filtering on minutes while sorting by title, raise
+    InvalidQuery instead of degrading as the table grows.
+
+    include=user embeds each recipe's author. The author columns are joined
+    into the page query on the user primary key, so the page costs the same
+    number of queries whatever its size.
+    """
+
+    def __init__(self, args, default_limit, max_limit):
+        self.fields = parse_fields(args.get('fields'), Recipe.SERIALIZABLE_FIELDS)
+        self.limit = parse_limit(args.get('limit'), default_limit, max_limit)
+        self.include = parse_include(args.get('include'), ('user',))
+
+        sort = args.get('sort', 'id')
+        self.descending = sort.startswith('-')
+        self.sort = sort[1:] if self.descending else sort
+        if self.sort not in SORTS:
+            raise InvalidQuery(f"Cannot sort by {self.sort}.")
+        self.column, allowed_filters = SORTS[self.sort]
+
+        for name, column in FILTERS.items():
+            if args.get(name) and name not in allowed_filters:
+                raise InvalidQuery(f"{name} requires sort={column} or sort=-{column}.")
+        self.min_minutes = parse_integer(args['min_minutes'], 'min_minutes') if args.get('min_minutes') else None
+        self.max_minutes = parse_integer(args['max_minutes'], 'max_minutes') if args.get('max_minutes') else None
+        self.title_prefix = args.get('title_prefix') or None
+        if self.title_prefix is not None:
+            try:
+                self.title_prefix.encode('utf-8')  # Lone surrogates can't be bound as SQLite text
+            except UnicodeEncodeError:
+                raise InvalidQuery("title_prefix must be valid text.")
+
+        self.after = None
+        if args.get('cursor'):
+            self.after = decode_cursor(args['cursor'])
+            position = self.after.get('v')
+            if not is_integer(self.after.get('id')) or \
+                    (self.sort != 'id' and not (is_integer(position) or is_text(position))):
+                raise InvalidQuery("Invalid cursor.")
+
+    def statement(self, user_id):
+        """Builds the keyset SELECT for one page, plus one row to detect a next page."""
+        columns = [getattr(Recipe, field) for field in self.fields]
+        if self.sort not in self.fields:
+            columns.append(self.column)  # Needed for the cursor; dropped from the response
+        query = select(*columns).where(Recipe.user_id == user_id)
+        if 'user' in self.include:
+            query = query.add_columns(*[getattr(User, field).label(f'user.{field}') for field in User.AUTHOR_FIELDS])
+            query = query.join_from(Recipe, User, User.id == Recipe.user_id)
+
+        if self.min_minutes is not None:
+            query = query.where(Recipe.minutes_to_complete >= self.min_minutes)
+        if self.max_minutes is not None:
+            query = query.where(Recipe.minutes_to_complete <= self.max_minutes)
+        if self.title_prefix is not None:
+            # A half-open range rather than LIKE, so the title index serves it
+            query = query.where(Recipe.title >= self.title_prefix)
+            upper = prefix_upper_bound(self.title_prefix)
+            if upper is not None:
+                query = query.where(Recipe.title < upper)
+
+        if self.sort == 'id':
+            key, order = Recipe.id, [Recipe.id]
+            position = self.after['id'] if self.after else None
+        else:
+            key, order = tuple_(self.column, Recipe.id), [self.column, Recipe.id]
+            position = tuple_(self.after['v'], self.after['id']) if self.after else None
+        if position is not None:
+            query = query.where(key < position if self.descending else key > position)
+        if self.descending:
+            order = [column.desc() for column in order]
+        return query.order_by(*order).limit(self.limit + 1)
+
+    def version_statement(self, user_id):
+        """Selects what the page's ETag depends on besides the query string.
+
+        The user's recipes_version changes whenever any of their recipes does;
+        with include=user the embedded author's profile matters too.
+        """
+        columns = [User.recipes_version]
+        if 'user' in self.include:
+            columns += [getattr(User, field) for field in User.AUTHOR_FIELDS if field != 'id']
+        return select(*columns).where(User.id == user_id)
+
+    def etag(self, user_id, version, query_string):
+        """Builds the ETag from a version_statement() row and the raw query string."""
+        digest = hashlib.sha1(query_string)
+        if len(version) > 1:
+            digest.update(repr(tuple(version[1:])).encode())
+        return f"{user_id}-{version[0]}-{digest.hexdigest()[:16]}"
+
+    def page(self, result):
+        """Returns the page's rows as dicts and the cursor for the next page, if any."""
+        keys = list(result.keys())
+        rows = [dict(zip(keys, row)) for row in result]
+        page = rows[:self.limit]
+        next_cursor = None
+        if len(rows) > self.limit:
+            last = page[-1]
+            position = {'id': last['id']}
+            if self.sort != 'id':
+                position['v'] = last[self.sort]
+            next_cursor = encode_cursor(position)
+        if self.sort not in self.fields:
+            for row in page:
+                del row[self.sort]
+        if 'user' in self.include:
+            for row in page:
+                row['user'] = {field: row.pop(f'user.{field}') for field in User.AUTHOR_FIELDS}
+        return page, next_cursor
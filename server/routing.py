@@ -0,0 +1,35 @@
+import random
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import CompoundSelect, Select
+
+
+class RoutingSession(Session):
+    """Sends reads to a read replica and everything else to the primary.
+
+    SELECTs go to one of the binds listed in SQLALCHEMY_READ_REPLICAS. Flushes,
+    DML and anything that is not a plain SELECT (e.g. raw text()) go to the
+    primary. After the first write, the session stays on the primary until
+    it is removed at the end of the app context, so a request always reads
+    its own writes, including across commits. Pass
+    bind_arguments={'primary': True} to execute() to force a read onto the
+    primary.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, primary=False, **kwargs):
+        if bind is not None:
+            return bind
+
+        replicas = current_app.config.get('SQLALCHEMY_READ_REPLICAS')
+        is_read = not self._flushing and isinstance(clause, (Select, CompoundSelect))
+        if not is_read:
+            self._pinned_to_primary = True
+        elif replicas and not primary and not self._pinned_to_primary:
+            return self._db.engines[random.choice(replicas)]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,46 @@
+import functools
+import os
+
+# Alembic is imported inside the functions below: it is slow to import and
+# only needed at startup outside of tests, or by `flask db`
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keeps autogenerate from proposing to drop the FTS5 tables created by raw DDL."""
+    return not (type_ == 'table' and reflected and compare_to is None and name.startswith('recipe_fts'))
+
+
+class SchemaMismatchError(RuntimeError):
+    """Raised at startup when the database is not at the latest migration."""
+
+
+@functools.lru_cache(maxsize=None)
+def head_revision():
+    """Returns the newest revision in the migrations directory without touching the database."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS_DIR)
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def check_schema_revision(engine):
+    """Compares the database's alembic_version against the migrations head.
+
+    This is a single-row read, unlike create_all() which reflects every table
+    on each boot, and it guarantees the app only runs against the schema the
+    migrations (and therefore models.py) describe.
+    """
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    head = head_revision()
+    if current != head:
+        raise SchemaMismatchError(
+            f"Database is at revision {current or '<none>'} but the code expects {head}. "
+            "Run `SKIP_SCHEMA_CHECK=1 flask db upgrade` before starting the app."
+        )
@@ -0,0 +1,45 @@
+from sqlalchemy import text
+
+from pagination import InvalidQuery
+
+# bm25 column weights: title matches count 10x instruction matches; owner is a filter only.
+# Pages are an OFFSET into the ranking rather than a seek past the last (score, id):
+# bm25 uses document counts and lengths across every user's recipes, so any write
+# moves every score and a stored score no longer marks a position. The offset keeps
+# its place unless the relative order of the user's own matches changes between
+# pages. It is bounded by the search window, which keeps the skipped rows cheap.
+SEARCH_QUERY = text("""
+    SELECT recipe_fts.rowid AS id,
+           recipe_fts.title AS title,
+           snippet(recipe_fts, 1, '[', ']', '...', 12) AS snippet,
+           bm25(recipe_fts, 10.0, 1.0, 0.0) AS score
+    FROM recipe_fts
+    WHERE recipe_fts MATCH :match
+    ORDER BY score, id
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def build_match(q, user_id):
+    """Turns free text into an FTS5 query scoped to one user's recipes.
+
+    Every word is quoted, so FTS5 syntax in user input is matched literally
+    rather than interpreted, and all words must appear in the title or
+    instructions.
+    """
+    words = q.split()
+    if not words:
+        raise InvalidQuery("q is required.")
+    phrases = ' AND '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+    return f'owner:"u{user_id}" AND {{title instructions}}:({phrases})'
+
+
+def search_recipes(session, user_id, q, limit, offset=0):
+    """Returns up to limit matches ranked best first, skipping the first offset."""
+    result = session.execute(SEARCH_QUERY, {
+        'match': build_match(q, user_id),
+        'limit': limit,
+        'offset': offset,
+    })
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -1,59 +1,45 @@
 #!/usr/bin/env python3
+"""Fills the database with synthetic users and recipes.
 
-from random import randint, choice as rc
-from faker import Faker
+    python seed.py                                   # 20 users, 100 recipes
+    python seed.py --users 10000 --recipes 1000000 --seed 7
+
+Rows are generated from a seeded RNG, so the same options always build the
+same dataset, and are written in bulk Core inserts. Every user shares one
+precomputed password hash unless --per-user-passwords is given.
+"""
+import sys
+import time
+
+import click
 
 from app import app
-from models import db, Recipe, User
-
-fake = Faker()
-
-with app.app_context():
-
-    print("Deleting all records...")
-    Recipe.query.delete()
-    User.query.delete()
-
-    print("Creating users...")
-
-    # Ensure users have unique usernames
-    users = []
-    usernames = []
-
-    for i in range(20):
-        username = fake.first_name()
-        while username in usernames:
-            username = fake.first_name()
-        usernames.append(username)
-
-        user = User(
-            username=username,
-            bio=fake.paragraph(nb_sentences=3),
-            image_url=fake.url(),
-        )
-        
-        # Use the password property to set the password
-        user.password = user.username + 'password'  # This will hash the password
-
-        users.append(user)
-
-    db.session.add_all(users)
-
-    print("Creating recipes...")
-    recipes = []
-    for i in range(100):
-        instructions = fake.paragraph(nb_sentences=8)
-        
-        recipe = Recipe(
-            title=fake.sentence(),
-            instructions=instructions,
-            minutes_to_complete=randint(15, 90),
-        )
-        
-        recipe.user = rc(users)  
-        recipes.append(recipe)
-
-    db.session.add_all(recipes)
-
-    db.session.commit()
-    print("Complete.")
\ No newline at end of file
+from models import db
+from seeding import seed
+
+
+@click.command()
+@click.option('--users', default=20, show_default=True, help='Users to create.')
+@click.option('--recipes', default=100, show_default=True, help='Recipes to create, spread across the users.')
+@click.option('--seed', 'rng_seed', default=0, show_default=True, help='RNG seed; the same seed builds the same rows.')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows per INSERT.')
+@click.option('--password', default='password', show_default=True, help='Password for every user.')
+@click.option('--per-user-passwords', is_flag=True,
+              help="Hash '<username><password>' separately for each user, at full cost.")
+def main(users, recipes, rng_seed, batch_size, password, per_user_passwords):
+    start = time.perf_counter()
+    interactive = sys.stderr.isatty()
+
+    def progress(table, done, total):
+        if interactive or done == total:
+            click.echo(f'\r{table}: {done}/{total} ({time.perf_counter() - start:.1f}s)',
+                       nl=done == total, err=True)
+
+    with app.app_context():
+        seed(db.engine, users, recipes, rng_seed=rng_seed, batch_size=batch_size, password=password,
+             hasher=app.extensions['password_hasher'], shared_hash=not per_user_passwords, progress=progress)
+    click.echo(f'Seeded {users} users and {recipes} recipes in {time.perf_counter() - start:.1f}s.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import contextlib
+import random
+
+from sqlalchemy import delete, func, insert, select, text, update
+
+from models import Recipe, User, UserSession
+from stats import rebuild_recipe_stats
+
+WORDS = (
+    'apple basil butter caramel carrot cheese chili cinnamon coconut cream crispy cumin curry dough '
+    'egg fennel garlic ginger glazed honey herb lemon lime maple mint mushroom noodle onion orange '
+    'paprika pasta peanut pepper pie pork potato pumpkin rice roasted saffron salmon salted sesame '
+    'smoked soup spiced spinach stew sweet tart thyme toasted tomato vanilla walnut'
+).split()
+VERBS = 'bake blend boil braise chop fold fry grill knead mix roast rest season simmer slice stir toss whisk'.split()
+
+
+def sentence(rng):
+    return f"{rng.choice(VERBS).capitalize()} the {' '.join(rng.choices(WORDS, k=rng.randint(3, 8)))}."
+
+
+class TextPool:
+    """Titles and sentences drawn once from the RNG, then recombined per row.
+
+    Composing every recipe word by word dominates the seeding time; picking
+    from a few thousand pre-built pieces keeps the text varied enough for
+    search and sorting at a fraction of the cost.
+    """
+
+    def __init__(self, rng, size=4096):
+        self.rng = rng
+        self.titles = [' '.join(rng.choices(WORDS, k=rng.randint(2, 4))).capitalize() for _ in range(size)]
+        self.sentences = [sentence(rng) for _ in range(size)]
+
+    def title(self):
+        return self.rng.choice(self.titles)
+
+    def paragraph(self):
+        return ' '.join(self.rng.choices(self.sentences, k=3 + int(self.rng.random() * 6)))
+
+
+@contextlib.contextmanager
+def recipe_triggers_disabled(conn):
+    """Drops the recipe triggers for the duration, then recreates them.
+
+    Per-row triggers (ETag versions, the FTS index, recipe stats) cost more than the insert
+    itself; the seeder rebuilds what they maintain once at the end instead.
+    """
+    triggers = conn.execute(text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'recipe'")).all()
+    for name, _ in triggers:
+        conn.execute(text(f'DROP TRIGGER {name}'))
+    try:
+        yield
+    finally:
+        for _, sql in triggers:
+            conn.execute(text(sql))
+
+
+def rebuild_derived(conn):
+    """Recomputes what the recipe triggers maintain, after rows were loaded without them."""
+    conn.execute(text("INSERT INTO recipe_fts(recipe_fts) VALUES ('rebuild')"))
+    counts = select(func.count()).where(Recipe.user_id == User.id).scalar_subquery()
+    conn.execute(update(User).values(recipes_version=User.recipes_version + counts))
+    rebuild_recipe_stats(conn)
+
+
+def seed(engine, users, recipes, rng_seed=0, batch_size=10000, password='password', hasher=None,
+         shared_hash=True, progress=None):
+    """Replaces every user, recipe and session with synthetic rows, in bulk Core inserts.
+
+    The same rng_seed always yields the same rows. New users get ids above
+    every id that existed before, so a session cookie or cached response from
+    before the reseed can't refer to one of them. With shared_hash, the
+    password is hashed once and every user gets that hash, which is what makes
+    large user counts cheap; otherwise each user's password is
+    f'{username}{password}', hashed at full cost. progress, if given, is
+    called with (table, rows_done, rows_total) after every batch.
+    """
+    rng = random.Random(rng_seed)
+    progress = progress or (lambda table, done, total: None)
+
+    with engine.connect() as conn:
+        synchronous = conn.exec_driver_sql('PRAGMA synchronous').scalar()
+        conn.exec_driver_sql('PRAGMA synchronous=OFF')  # A failed seed is simply rerun
+        conn.commit()
+        try:
+            with conn.begin(), recipe_triggers_disabled(conn):
+                # user has no AUTOINCREMENT, so once emptied it would hand out 1, 2, ... again
+                first_user_id = conn.execute(select(func.coalesce(func.max(User.id), 0) + 1)).scalar()
+                conn.execute(delete(UserSession))
+                conn.execute(delete(Recipe))
+                conn.execute(delete(User))
+                insert_users(conn, rng, first_user_id, users, batch_size, password, hasher, shared_hash, progress)
+                insert_recipes(conn, rng, first_user_id, users, recipes, batch_size, progress)
+                rebuild_derived(conn)
+        finally:
+            conn.exec_driver_sql(f'PRAGMA synchronous={synchronous}')
+            conn.commit()
+
+
+def insert_users(conn, rng, first_id, users, batch_size, password, hasher, shared_hash, progress):
+    shared = hasher.hash(password) if shared_hash else None
+    batch = []
+    for i in range(1, users + 1):
+        # The index suffix keeps usernames unique without retrying collisions
+        username = f'{rng.choice(WORDS)}{i}'
+        batch.append({
+            'id': first_id + i - 1,
+            'username': username,
+            '_password_hash': shared or hasher.hash(f'{username}{password}'),
+            'bio': sentence(rng),
+            'image_url': f'https://example.com/users/{i}.jpg',
+        })
+        if len(batch) >= batch_size or i == users:
+            conn.execute(insert(User), batch)
+            batch.clear()
+            progress('user', i, users)
+
+
+def insert_recipes(conn, rng, first_user_id, users, recipes, batch_size, progress):
+    # Recipes are generated grouped by owner, so they are appended to the
+    # (user_id, ...) indexes in order instead of scattered across them. Their
+    # ids come from AUTOINCREMENT, which never reuses a deleted recipe's id.
+    owners = [0] * users
+    for _ in range(recipes if users else 0):
+        owners[int(rng.random() * users)] += 1
+    text_pool = TextPool(rng)
+    batch = []
+    done = 0
+    for user_id, count in enumerate(owners, start=first_user_id):
+        for _ in range(count):
+            done += 1
+            batch.append({
+                'title': text_pool.title(),
+                'instructions': text_pool.paragraph(),
+                'minutes_to_complete': 5 + int(rng.random() * 236),
+                'user_id': user_id,
+            })
+            if len(batch) >= batch_size or done == recipes:
+                conn.execute(insert(Recipe), batch)
+                batch.clear()
+                progress('recipe', done, recipes)
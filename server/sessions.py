@@ -0,0 +1,196 @@
+import secrets
+from datetime import datetime
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from werkzeug.datastructures import CallbackDict
+
+from models import User, UserSession
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session data held on the server; the cookie only carries its id."""
+
+    def __init__(self, initial=None, sid=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.modified = False
+        self.regenerated = False
+
+    def regenerate(self):
+        """Issue a new session id when this session is saved, discarding the old one.
+
+        Call it whenever the session's privilege changes, e.g. at login, so a
+        session id planted in the client beforehand never becomes authenticated.
+        """
+        self.regenerated = True
+        self.modified = True
+
+
+class SessionBackend:
+    """Persistent storage for server-side sessions.
+
+    load() returns a (data, user_id, expires_at) tuple or None. Subclass this
+    to keep sessions somewhere other than the SQLite database.
+    """
+
+    def load(self, sid):
+        raise NotImplementedError
+
+    def save(self, sid, data, user_id, expires_at):
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+    def delete_user(self, user_id):
+        raise NotImplementedError
+
+    def purge_expired(self, now):
+        raise NotImplementedError
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Keeps sessions in the user_session table.
+
+    Uses its own connections on the primary engine, so session writes commit
+    independently of the request's transaction and are never read from a lagging
+    replica.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def load(self, sid):
+        query = (
+            select(UserSession.data, UserSession.user_id, UserSession.expires_at,
+                   User.id.label('live_user_id'))
+            .outerjoin(User, User.id == UserSession.user_id)
+            .where(UserSession.id == sid)
+        )
+        with self.db.engine.connect() as conn:
+            row = conn.execute(query).first()
+        if row is None:
+            return None
+        if row.user_id is not None and row.live_user_id is None:
+            return None  # The account was deleted, so its sessions no longer authenticate
+        return row.data, row.user_id, row.expires_at
+
+    def save(self, sid, data, user_id, expires_at):
+        values = {'data': data, 'user_id': user_id, 'expires_at': expires_at}
+        statement = insert(UserSession).values(id=sid, **values)
+        with self.db.engine.begin() as conn:
+            conn.execute(statement.on_conflict_do_update(index_elements=['id'], set_=values))
+
+    def delete(self, sid):
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(UserSession).where(UserSession.id == sid))
+
+    def delete_user(self, user_id):
+        with self.db.engine.begin() as conn:
+            return conn.execute(delete(UserSession).where(UserSession.user_id == user_id)).rowcount
+
+    def purge_expired(self, now):
+        with self.db.engine.begin() as conn:
+            return conn.execute(delete(UserSession).where(UserSession.expires_at <= now)).rowcount
+
+
+class SessionStore:
+    """A session backend with an in-process LRU cache in front of it.
+
+    Cached entries hold the serialized data, so authenticated requests usually
+    never touch the database. Revocations in this process take effect
+    immediately; other processes see them once their cached copy's TTL lapses.
+    """
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+
+    def get(self, sid):
+        entry = self.cache.get(sid)
+        if entry is None:
+            entry = self.backend.load(sid)
+            if entry is None:
+                return None
+            self.cache.set(sid, entry)
+        if entry[2] <= datetime.utcnow():
+            self.delete(sid)
+            return None
+        return entry
+
+    def save(self, sid, data, user_id, expires_at):
+        self.backend.save(sid, data, user_id, expires_at)
+        self.cache.set(sid, (data, user_id, expires_at))
+
+    def delete(self, sid):
+        self.backend.delete(sid)
+        self.cache.delete(sid)
+
+    def revoke_user(self, user_id):
+        """Logs a user out everywhere; returns the number of sessions removed."""
+        removed = self.backend.delete_user(user_id)
+        self.cache.delete_where(lambda entry: entry[1] == user_id)
+        return removed
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface backed by a SessionStore.
+
+    The cookie holds a random 256-bit session id, so its size stays constant
+    whatever the session contains, and logging out really ends the session.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid)
+            if entry is not None:
+                return ServerSideSession(self.serializer.loads(entry[0]), sid=sid)
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.regenerated and session.sid:
+            self.store.delete(session.sid)
+            session.sid = None
+
+        if not session:
+            if session.modified:
+                if session.sid:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # Only write when the data changed; reads never cost a database write
+        if not session.modified:
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        expires_at = datetime.utcnow() + app.permanent_session_lifetime
+        self.store.save(session.sid, self.serializer.dumps(dict(session)),
+                        session.get('user_id'), expires_at)
+        response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                            httponly=httponly, domain=domain, path=path, secure=secure,
+                            samesite=samesite)
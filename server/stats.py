@@ -0,0 +1,44 @@
+from sqlalchemy import delete, func, insert, select
+
+from models import Recipe, User, UserRecipeStats
+
+
+def user_stats_statement(user_id):
+    """One primary-key lookup per table, however many recipes the user owns.
+
+    The outer join keeps users without recipes (and so without a summary row),
+    and returns nothing for a user that no longer exists.
+    """
+    return (
+        select(UserRecipeStats.recipe_count, UserRecipeStats.minutes_total, UserRecipeStats.min_minutes,
+               UserRecipeStats.max_minutes, UserRecipeStats.latest_recipe_id)
+        .select_from(User)
+        .outerjoin(UserRecipeStats, UserRecipeStats.user_id == User.id)
+        .where(User.id == user_id)
+    )
+
+
+def stats_to_dict(row):
+    count = row.recipe_count or 0
+    return {
+        'recipe_count': count,
+        'average_minutes': row.minutes_total / count if count else None,
+        'min_minutes': row.min_minutes,
+        'max_minutes': row.max_minutes,
+        'latest_recipe_id': row.latest_recipe_id,
+    }
+
+
+def rebuild_recipe_stats(conn):
+    """Recomputes every user's summary from the recipe table in one pass.
+
+    For backfills and for loads that ran with the recipe triggers dropped;
+    returns the number of users with recipes.
+    """
+    conn.execute(delete(UserRecipeStats))
+    minutes = Recipe.minutes_to_complete
+    return conn.execute(insert(UserRecipeStats).from_select(
+        ['user_id', 'recipe_count', 'minutes_total', 'min_minutes', 'max_minutes', 'latest_recipe_id'],
+        select(Recipe.user_id, func.count(), func.sum(minutes), func.min(minutes), func.max(minutes),
+               func.max(Recipe.id)).group_by(Recipe.user_id),
+    )).rowcount
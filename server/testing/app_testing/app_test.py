@@ -1,17 +1,34 @@
+import gzip
+import json
+
 import pytest
 from faker import Faker
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
 from app import create_app, db
+from asgi import create_asgi_app
 from models import User, Recipe
+from pagination import InvalidQuery, encode_cursor
+from query_counter import max_queries
+from recipe_query import RecipeListQuery
 
 fake = Faker()
 
-@pytest.fixture(scope='module')
-def test_client():
-    """Set up a test client for the Flask application."""
-    app = create_app('testing')  # Use testing config
+@pytest.fixture(scope='module', params=['wsgi', 'asgi'])
+def test_client(request, tmp_path_factory):
+    """Set up a test client for the Flask application, served over WSGI or ASGI."""
+    if request.param == 'asgi':
+        # The sync and async engines need to share a database file
+        database = tmp_path_factory.mktemp('asgi') / 'app.db'
+        asgi_app = create_asgi_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}'})
+        app = asgi_app.flask_app
+        client = asgi_app.test_client()
+    else:
+        app = create_app('testing')  # Use testing config
+        client = app.test_client()
     app.config['TESTING'] = True
 
-    with app.test_client() as client:
+    with client:
         with app.app_context():
             db.create_all()  # Create the database for testing
             yield client
@@ -80,6 +97,33 @@ class TestLogin:
         with test_client.session_transaction() as session:
             assert session['user_id'] == new_user.id
 
+    def test_upgrades_outdated_hash_on_login(self, test_client, new_user):
+        """Rehashes passwords stored under an older policy when users log in."""
+        new_user._password_hash = generate_password_hash('password', 'pbkdf2:sha256:1000')
+        db.session.commit()
+
+        response = test_client.post('/login', json={
+            'username': new_user.username,
+            'password': 'password',
+        })
+
+        assert response.status_code == 200
+        db.session.refresh(new_user)
+        current = test_client.application.extensions['password_hasher'].method
+        assert new_user._password_hash.startswith(current + '$')
+        assert new_user.verify_password('password')
+
+    def test_reports_hash_schemes(self, test_client, new_user):
+        """Lists the password hash schemes in use with `flask hash-report`."""
+        new_user._password_hash = generate_password_hash('password', 'pbkdf2:sha256:1000')
+        db.session.commit()
+
+        result = test_client.application.test_cli_runner().invoke(args=['hash-report'])
+
+        assert result.exit_code == 0
+        assert 'pbkdf2:sha256:1000\t' in result.output
+        assert '(current)' in result.output
+
     def test_401s_bad_logins(self, test_client):
         """Returns 401 for an invalid username and password at /login."""
         response = test_client.post('/login', json={
@@ -111,6 +155,7 @@ class TestLogout:
 class TestRecipeIndex:
     """Recipe index tests."""
 
+    @max_queries(2)
     def test_lists_recipes_with_200(self, test_client, new_user):
         """Returns a list of recipes associated with the logged-in user and a 200 status code."""
         recipes = [
@@ -129,6 +174,243 @@ class TestRecipeIndex:
         response_json = response.get_json()
         assert len(response_json) == 5
 
+    def test_paginates_recipes_with_cursor(self, test_client, new_user):
+        """Pages through recipes with ?limit= and the X-Next-Cursor header."""
+        recipes = [
+            Recipe(title=fake.sentence(), instructions=fake.paragraph(), minutes_to_complete=30, user_id=new_user.id)
+            for _ in range(5)
+        ]
+        db.session.add_all(recipes)
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        seen = []
+        response = test_client.get('/recipes?limit=2')
+        while True:
+            assert response.status_code == 200
+            seen.extend(recipe['id'] for recipe in response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            response = test_client.get(f'/recipes?limit=2&cursor={cursor}')
+
+        assert seen == sorted(recipe.id for recipe in recipes)
+
+    def test_client_walk_returns_every_recipe(self, test_client, new_user):
+        """Following X-Next-Cursor from the default page, as RecipeList.js does, reaches every recipe."""
+        page_size = test_client.application.config['RECIPES_PAGE_SIZE']
+        db.session.add_all([
+            Recipe(title=f'Paged {i}', instructions='Stir.', minutes_to_complete=i, user_id=new_user.id)
+            for i in range(page_size * 2 + 1)
+        ])
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        pages = []
+        response = test_client.get('/recipes?include=user')
+        while True:
+            assert response.status_code == 200
+            pages.append(response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            response = test_client.get(f'/recipes?include=user&cursor={cursor}')
+
+        assert [len(page) for page in pages] == [page_size, page_size, 1]
+        recipes = [recipe for page in pages for recipe in page]
+        assert len({recipe['id'] for recipe in recipes}) == page_size * 2 + 1
+        assert {recipe['user']['username'] for recipe in recipes} == {new_user.username}
+
+    def test_projects_requested_fields(self, test_client, new_user):
+        """Returns only the columns named in ?fields=, plus id."""
+        db.session.add(Recipe(title='Projected', instructions='Long text', minutes_to_complete=10, user_id=new_user.id))
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        response = test_client.get('/recipes?fields=title,minutes_to_complete')
+        assert response.status_code == 200
+        assert response.get_json() == [{'id': response.get_json()[0]['id'], 'title': 'Projected', 'minutes_to_complete': 10}]
+
+    @max_queries(2)
+    def test_embeds_authors_in_constant_queries(self, test_client, new_user):
+        """Embeds each recipe's author with ?include=user at the same query count for any page size."""
+        db.session.add_all([
+            Recipe(title=f'Authored {i}', instructions='Knead.', minutes_to_complete=i, user_id=new_user.id)
+            for i in range(6)
+        ])
+        new_user.image_url = 'https://example.com/chef.jpg'
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        for limit in (1, 6):
+            response = test_client.get(f'/recipes?include=user&fields=title&limit={limit}')
+            assert response.status_code == 200
+            assert len(response.get_json()) == limit
+            assert response.get_json()[0]['user'] == {
+                'id': new_user.id, 'username': new_user.username, 'image_url': 'https://example.com/chef.jpg'}
+
+        assert test_client.get('/recipes?include=comments').status_code == 422
+
+    def test_author_changes_invalidate_embedded_etag(self, test_client, new_user):
+        """Changes the ETag of an ?include=user listing when the author's profile changes."""
+        db.session.add(Recipe(title='Profiled', instructions='Rest.', minutes_to_complete=5, user_id=new_user.id))
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        plain = test_client.get('/recipes').headers['ETag']
+        embedded = test_client.get('/recipes?include=user').headers['ETag']
+        new_user.image_url = 'https://example.com/new.jpg'
+        db.session.commit()
+
+        assert test_client.get('/recipes').headers['ETag'] == plain
+        assert test_client.get('/recipes?include=user').headers['ETag'] != embedded
+
+    def test_serves_compact_json_in_column_order(self, test_client, new_user):
+        """Encodes recipe lists compactly, with keys in column order."""
+        db.session.add(Recipe(title='Compact', instructions='Fold.', minutes_to_complete=5, user_id=new_user.id))
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        body = test_client.get('/recipes').data.decode()
+        assert '\n' not in body.rstrip('\n')
+        assert body.startswith('[{"id":')
+        assert list(json.loads(body)[0]) == list(Recipe.SERIALIZABLE_FIELDS)
+
+    def test_sorts_and_filters_recipes(self, test_client, new_user):
+        """Sorts by minutes or title in either direction, with range filters on the sorted column."""
+        db.session.add_all([
+            Recipe(title=title, instructions='Cook.', minutes_to_complete=minutes, user_id=new_user.id)
+            for title, minutes in [('Bread', 90), ('Broth', 45), ('Apple tart', 60), ('Salad', 10)]
+        ])
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        def titles(query):
+            response = test_client.get(f'/recipes?{query}')
+            assert response.status_code == 200
+            return [recipe['title'] for recipe in response.get_json()]
+
+        assert titles('sort=minutes_to_complete') == ['Salad', 'Broth', 'Apple tart', 'Bread']
+        assert titles('sort=-title') == ['Salad', 'Broth', 'Bread', 'Apple tart']
+        assert titles('sort=-minutes_to_complete&min_minutes=30&max_minutes=60') == ['Apple tart', 'Broth']
+        assert titles('sort=title&title_prefix=Br') == ['Bread', 'Broth']
+
+        seen = []
+        response = test_client.get('/recipes?sort=-minutes_to_complete&limit=3&fields=title')
+        while True:
+            seen.extend(recipe['title'] for recipe in response.get_json())
+            assert all(set(recipe) == {'id', 'title'} for recipe in response.get_json())
+            if 'X-Next-Cursor' not in response.headers:
+                break
+            response = test_client.get(
+                f"/recipes?sort=-minutes_to_complete&limit=3&fields=title&cursor={response.headers['X-Next-Cursor']}")
+        assert seen == ['Bread', 'Apple tart', 'Broth', 'Salad']
+
+    def test_title_prefix_handles_edge_code_points(self, test_client, new_user):
+        """Serves prefixes ending in U+D7FF or U+10FFFF, whose successor isn't simply the next code point."""
+        for title in ('A\U0010ffff', 'A\U0010ffffz', 'B', '\ud7ffcake', '\ue000cake'):
+            db.session.add(Recipe(title=title, instructions='Stir.', minutes_to_complete=5, user_id=new_user.id))
+        db.session.commit()
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        def titles(prefix):
+            response = test_client.get('/recipes', query_string={'sort': 'title', 'title_prefix': prefix})
+            assert response.status_code == 200
+            return [recipe['title'] for recipe in response.get_json()]
+
+        assert titles('A\U0010ffff') == ['A\U0010ffff', 'A\U0010ffffz']
+        assert titles('\U0010ffff') == []
+        assert titles('\ud7ff') == ['\ud7ffcake']
+        with pytest.raises(InvalidQuery):
+            RecipeListQuery({'sort': 'title', 'title_prefix': '\ud800'}, 10, 10)
+
+    def test_rejects_filters_without_a_supporting_index(self, test_client, new_user):
+        """Returns 422 for sort/filter combinations no index can serve."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        assert test_client.get('/recipes?sort=title&min_minutes=10').status_code == 422
+        assert test_client.get('/recipes?title_prefix=Br').status_code == 422
+        assert test_client.get('/recipes?sort=instructions').status_code == 422
+        assert test_client.get('/recipes?sort=minutes_to_complete&max_minutes=soon').status_code == 422
+
+    def test_revalidates_with_etag(self, test_client, new_user):
+        """Returns 304 without querying the recipe table when the ETag still matches."""
+        db.session.add(Recipe(title='Cached', instructions='Rest.', minutes_to_complete=5, user_id=new_user.id))
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        response = test_client.get('/recipes')
+        etag = response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+        assert 'Cookie' in response.headers['Vary']
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = test_client.get('/recipes', headers={'If-None-Match': etag})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert not [statement for statement in statements if 'FROM recipe' in statement]
+
+    def test_etag_changes_when_recipes_change(self, test_client, new_user):
+        """Creating, updating or deleting a recipe invalidates the previous ETag."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        etags = [test_client.get('/recipes').headers['ETag']]
+        test_client.post('/recipes', json={'title': 'Versioned', 'instructions': 'Stir.', 'minutes_to_complete': 5})
+        etags.append(test_client.get('/recipes').headers['ETag'])
+        recipe = Recipe.query.filter_by(user_id=new_user.id).one()
+        recipe.minutes_to_complete = 6
+        db.session.commit()
+        etags.append(test_client.get('/recipes').headers['ETag'])
+        db.session.delete(recipe)
+        db.session.commit()
+        etags.append(test_client.get('/recipes').headers['ETag'])
+
+        assert len(set(etags)) == 4
+        assert test_client.get('/recipes', headers={'If-None-Match': etags[0]}).status_code == 200
+
+    def test_returns_422_for_bad_list_parameters(self, test_client, new_user):
+        """Returns 422 for unknown fields, bad limits and forged cursors."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        assert test_client.get('/recipes?fields=password').status_code == 422
+        assert test_client.get('/recipes?limit=0').status_code == 422
+        assert test_client.get('/recipes?cursor=not-a-cursor').status_code == 422
+        for position in ({'id': True}, {'id': 2 ** 63}):
+            assert test_client.get(f'/recipes?cursor={encode_cursor(position)}').status_code == 422
+        for position in ({'id': 1, 'v': 2 ** 64}, {'id': 1, 'v': False}, {'id': 1, 'v': '\ud800'}):
+            assert test_client.get(f'/recipes?sort=title&cursor={encode_cursor(position)}').status_code == 422
+        assert test_client.get(f'/recipes?sort=minutes_to_complete&min_minutes={2 ** 63}').status_code == 422
+        assert test_client.get(f'/recipes?sort=minutes_to_complete&max_minutes=-{10 ** 30}').status_code == 422
+
     def test_get_route_returns_401_when_not_logged_in(self, test_client):
         """Returns 401 when user is not logged in."""
         # Ensure no user is logged in
@@ -162,6 +444,408 @@ class TestRecipeIndex:
         response = test_client.post('/recipes', json={})  # Missing all required fields
         assert response.status_code == 422
 
+    def test_returns_422_when_minutes_are_out_of_range(self, test_client, new_user):
+        """Rejects negative and oversized minutes at /recipes instead of overflowing the insert."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        for minutes in (-1, 10 ** 30, '9' * 30, 2 ** 31):
+            # Encoded with the stdlib; the test client's orjson refuses integers past 64 bits
+            body = json.dumps({'title': 'Too long', 'instructions': 'Wait.', 'minutes_to_complete': minutes})
+            response = test_client.post('/recipes', data=body, content_type='application/json')
+            assert response.status_code == 422
+        assert Recipe.query.filter_by(title='Too long').count() == 0
+
+class TestRecipeItem:
+    """Single recipe read, partial update and delete tests."""
+
+    def create_recipe(self, user_id, **values):
+        recipe = Recipe(**{'title': 'Pancakes', 'instructions': 'Whisk and fry.', 'minutes_to_complete': 20,
+                           'user_id': user_id, **values})
+        db.session.add(recipe)
+        db.session.commit()
+        return recipe.id
+
+    def log_in(self, test_client, user_id):
+        with test_client.session_transaction() as session:
+            session['user_id'] = user_id
+
+    @max_queries(2)
+    def test_reads_a_recipe_with_its_etag(self, test_client, new_user):
+        """Returns the recipe and its version as the ETag in one query, and 304s a matching If-None-Match."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+
+        response = test_client.get(f'/recipes/{recipe_id}')
+        assert response.status_code == 200
+        assert response.get_json() == {'id': recipe_id, 'title': 'Pancakes', 'instructions': 'Whisk and fry.',
+                                       'minutes_to_complete': 20, 'user_id': new_user.id}
+        assert response.headers['ETag'] == '"1"'
+        assert test_client.get(f'/recipes/{recipe_id}', headers={'If-None-Match': '"1"'}).status_code == 304
+
+    @max_queries(2)
+    def test_patches_only_submitted_columns(self, test_client, new_user):
+        """Writes the submitted columns and the version in a single UPDATE, and returns the new ETag."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = test_client.patch(f'/recipes/{recipe_id}', json={'minutes_to_complete': 25},
+                                         headers={'If-Match': '"1"'})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == '"2"'
+        assert response.get_json()['minutes_to_complete'] == 25
+        assert response.get_json()['title'] == 'Pancakes'
+        updates = [statement for statement in statements if statement.startswith('UPDATE recipe')]
+        assert len(updates) == 1
+        assert 'title' not in updates[0].split('WHERE')[0]
+        assert 'instructions' not in updates[0].split('WHERE')[0]
+
+    def test_rejects_stale_or_missing_versions(self, test_client, new_user):
+        """412s an If-Match naming an older version, 428s a PATCH without If-Match, and allows If-Match: *."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+        url = f'/recipes/{recipe_id}'
+
+        assert test_client.patch(url, json={'title': 'Crepes'}, headers={'If-Match': '"1"'}).status_code == 200
+        stale = test_client.patch(url, json={'title': 'Waffles'}, headers={'If-Match': '"1"'})
+        assert stale.status_code == 412
+        assert stale.headers['ETag'] == '"2"'
+        assert test_client.patch(url, json={'title': 'Waffles'}).status_code == 428
+        assert test_client.patch(url, json={'title': 'Waffles'}, headers={'If-Match': '*'}).status_code == 200
+        assert test_client.get(url).get_json()['title'] == 'Waffles'
+
+    def test_412s_if_match_tags_no_version_has(self, test_client, new_user):
+        """Treats non-ASCII digits, oversized and non-numeric tags as mismatches rather than failing."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+        url = f'/recipes/{recipe_id}'
+
+        for tag in ('"\u00b2"', f'"{2 ** 64}"', f'"{"9" * 40}"', '"abc"', '"0"'):
+            response = test_client.patch(url, json={'title': 'Crepes'}, headers={'If-Match': tag})
+            assert response.status_code == 412
+            assert response.headers['ETag'] == '"1"'
+
+    def test_404s_ids_past_64_bits(self, test_client, new_user):
+        """404s recipe ids no SQLite row could have instead of overflowing the query."""
+        self.log_in(test_client, new_user.id)
+
+        for method in (test_client.get, test_client.patch, test_client.delete):
+            response = method(f'/recipes/{2 ** 64}', headers={'If-Match': '*'})
+            assert response.status_code == 404
+            assert response.is_json
+
+    def test_rejects_invalid_patches(self, test_client, new_user):
+        """422s empty bodies, unknown fields and blank values."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+        url = f'/recipes/{recipe_id}'
+
+        for body in ({}, {'user_id': 99}, {'title': ''}, {'minutes_to_complete': None},
+                     {'minutes_to_complete': 10 ** 30}, {'minutes_to_complete': -5}):
+            response = test_client.patch(url, data=json.dumps(body), content_type='application/json',
+                                         headers={'If-Match': '"1"'})
+            assert response.status_code == 422
+
+    @max_queries(2)
+    def test_deletes_in_one_statement(self, test_client, new_user):
+        """Deletes the recipe with a single DELETE and 404s it afterwards."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+
+        assert test_client.delete(f'/recipes/{recipe_id}').status_code == 204
+        assert test_client.delete(f'/recipes/{recipe_id}').status_code == 404
+        assert db.session.get(Recipe, recipe_id) is None
+
+    def test_deleted_ids_are_not_reused(self, test_client, new_user):
+        """A recipe created after deleting the newest one gets a fresh id, so stale ETags can't match it."""
+        recipe_id = self.create_recipe(new_user.id)
+        self.log_in(test_client, new_user.id)
+        url = f'/recipes/{recipe_id}'
+        etag = test_client.get(url).headers['ETag']
+
+        assert test_client.delete(url).status_code == 204
+        assert test_client.post('/recipes', json={'title': 'Second pancakes', 'instructions': 'Pour and press.',
+                                                  'minutes_to_complete': 15}).status_code == 201
+
+        assert test_client.get(url, headers={'If-None-Match': etag}).status_code == 404
+        assert test_client.patch(url, json={'title': 'Pancakes'}, headers={'If-Match': etag}).status_code == 404
+        assert Recipe.query.filter_by(title='Second pancakes').one().id > recipe_id
+
+    def test_hides_other_users_recipes(self, test_client, new_user):
+        """404s reads, updates and deletes of another user's recipe and leaves it untouched."""
+        other = User(username=fake.user_name(), password='password')
+        db.session.add(other)
+        db.session.commit()
+        recipe_id = self.create_recipe(other.id)
+        self.log_in(test_client, new_user.id)
+        url = f'/recipes/{recipe_id}'
+
+        assert test_client.get(url).status_code == 404
+        assert test_client.patch(url, json={'title': 'Mine'}, headers={'If-Match': '*'}).status_code == 404
+        assert test_client.delete(url).status_code == 404
+        recipe = db.session.get(Recipe, recipe_id)
+        assert (recipe.title, recipe.version) == ('Pancakes', 1)
+
+    def test_item_routes_require_login(self, test_client):
+        """Returns 401 for every method when no user is logged in."""
+        with test_client.session_transaction() as session:
+            session.clear()
+
+        assert test_client.get('/recipes/1').status_code == 401
+        assert test_client.patch('/recipes/1', json={'title': 'x'}).status_code == 401
+        assert test_client.delete('/recipes/1').status_code == 401
+
+class TestRecipeBulkImport:
+    """Bulk recipe import tests."""
+
+    def test_imports_json_array_in_batches(self, test_client, new_user, monkeypatch):
+        """Inserts valid rows from a JSON array and reports invalid ones by position."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+        monkeypatch.setitem(test_client.application.config, 'RECIPES_BULK_BATCH_SIZE', 2)
+
+        rows = [
+            {'title': f'Bulk {i}', 'instructions': 'Mix.', 'minutes_to_complete': i}
+            for i in range(5)
+        ]
+        rows.insert(3, {'title': 'No instructions', 'minutes_to_complete': 5})
+        response = test_client.post('/recipes/bulk', json=rows)
+
+        assert response.status_code == 201
+        assert response.get_json() == {
+            'created': 5,
+            'failed': 1,
+            'errors': [{'row': 3, 'error': 'Invalid recipe data.'}],
+        }
+        assert Recipe.query.filter_by(user_id=new_user.id).count() == 5
+
+    def test_reports_wrongly_typed_rows(self, test_client, new_user, monkeypatch):
+        """Rejects non-string text and non-integer minutes per row instead of failing their batch."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+        monkeypatch.setitem(test_client.application.config, 'RECIPES_BULK_BATCH_SIZE', 2)
+
+        rows = [
+            {'title': 'Typed 0', 'instructions': 'Mix.', 'minutes_to_complete': 5},
+            {'title': {'x': 1}, 'instructions': 'Mix.', 'minutes_to_complete': 5},
+            {'title': 'Typed 2', 'instructions': ['Mix.'], 'minutes_to_complete': 5},
+            {'title': 'Typed 3', 'instructions': 'Mix.', 'minutes_to_complete': True},
+            {'title': 'Typed 4', 'instructions': 'Mix.', 'minutes_to_complete': 2.5},
+            {'title': 'Typed 5', 'instructions': 'Mix.', 'minutes_to_complete': '45'},
+            {'title': 'Typed 6', 'instructions': 'Mix.', 'minutes_to_complete': 10 ** 30},
+            {'title': 'Typed 7', 'instructions': 'Mix.', 'minutes_to_complete': '9' * 30},
+            {'title': 'Typed 8', 'instructions': 'Mix.', 'minutes_to_complete': -1},
+        ]
+        response = test_client.post('/recipes/bulk', data=json.dumps(rows), content_type='application/json')
+
+        assert response.status_code == 201
+        assert response.get_json()['created'] == 2
+        assert [error['row'] for error in response.get_json()['errors']] == [1, 2, 3, 4, 6, 7, 8]
+        assert Recipe.query.filter_by(title='Typed 5').one().minutes_to_complete == 45
+
+    def test_imports_ndjson_stream(self, test_client, new_user):
+        """Accepts NDJSON bodies and reports malformed lines."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        body = '\n'.join([
+            '{"title": "Stream 1", "instructions": "Boil.", "minutes_to_complete": 10}',
+            '{not json',
+            '{"title": "Stream 2", "instructions": "Fry.", "minutes_to_complete": 20}',
+        ])
+        response = test_client.post('/recipes/bulk', data=body, content_type='application/x-ndjson')
+
+        assert response.status_code == 201
+        assert response.get_json()['created'] == 2
+        assert response.get_json()['errors'] == [{'row': 1, 'error': 'Malformed JSON.'}]
+
+    def test_returns_422_when_nothing_is_valid(self, test_client, new_user):
+        """Returns 422 when no row could be imported."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        assert test_client.post('/recipes/bulk', json=[{}]).status_code == 422
+        assert test_client.post('/recipes/bulk', json={'title': 'Not a list'}).status_code == 422
+
+    def test_bulk_import_requires_login(self, test_client):
+        """Returns 401 when user is not logged in."""
+        with test_client.session_transaction() as session:
+            session.clear()
+
+        assert test_client.post('/recipes/bulk', json=[]).status_code == 401
+
+class TestRecipeSearch:
+    """Recipe search tests."""
+
+    def test_ranks_matches_with_snippets(self, test_client, new_user):
+        """Returns only the user's matching recipes, title matches first, with snippets."""
+        other = User(username=fake.user_name() + '_other', password='password')
+        db.session.add(other)
+        db.session.commit()
+        db.session.add_all([
+            Recipe(title='Sourdough loaf', instructions='Feed the starter overnight.', minutes_to_complete=600, user_id=new_user.id),
+            Recipe(title='Pancakes', instructions='Use leftover sourdough starter in the batter.', minutes_to_complete=20, user_id=new_user.id),
+            Recipe(title='Omelette', instructions='Whisk eggs.', minutes_to_complete=5, user_id=new_user.id),
+            Recipe(title='Sourdough pizza', instructions='Stretch the dough.', minutes_to_complete=30, user_id=other.id),
+        ])
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        response = test_client.get('/recipes/search?q=sourdough')
+        assert response.status_code == 200
+        results = response.get_json()
+        assert [result['title'] for result in results] == ['Sourdough loaf', 'Pancakes']
+        assert '[sourdough]' in results[1]['snippet']
+
+    def test_paginates_search_results(self, test_client, new_user):
+        """Pages through ranked results with the X-Next-Cursor header."""
+        db.session.add_all([
+            Recipe(title=f'Bagel {i}', instructions='Boil then bake the bagel ' * (i + 1), minutes_to_complete=60, user_id=new_user.id)
+            for i in range(5)
+        ])
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        seen = []
+        response = test_client.get('/recipes/search?q=bagel&limit=2')
+        while True:
+            seen.extend(result['id'] for result in response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            response = test_client.get(f'/recipes/search?q=bagel&limit=2&cursor={cursor}')
+
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_pages_survive_other_users_writes(self, test_client, new_user):
+        """Returns every match exactly once while other users' recipes shift the corpus-wide bm25 statistics."""
+        other = User(username=fake.user_name() + '_baker', password='password')
+        db.session.add(other)
+        db.session.add_all([
+            Recipe(title=f'Pretzel {i}', instructions='Dip the pretzel in lye ' * (i + 1), minutes_to_complete=60,
+                   user_id=new_user.id)
+            for i in range(5)
+        ])
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        seen = []
+        response = test_client.get('/recipes/search?q=pretzel&limit=2')
+        while True:
+            seen.extend(result['id'] for result in response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            # Fewer documents overall and more containing the term: every score moves
+            db.session.add_all([
+                Recipe(title='Pretzel bites', instructions='pretzel ' * 50, minutes_to_complete=30, user_id=other.id)
+                for _ in range(20)
+            ])
+            db.session.commit()
+            response = test_client.get(f'/recipes/search?q=pretzel&limit=2&cursor={cursor}')
+
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_stops_at_search_window(self, test_client, new_user, monkeypatch):
+        """Serves only the best-ranked RECIPES_SEARCH_WINDOW matches and rejects cursors past them."""
+        db.session.add_all([
+            Recipe(title=f'Brioche {i}', instructions='Knead.', minutes_to_complete=90, user_id=new_user.id)
+            for i in range(5)
+        ])
+        db.session.commit()
+        monkeypatch.setitem(test_client.application.config, 'RECIPES_SEARCH_WINDOW', 3)
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        first = test_client.get('/recipes/search?q=brioche&limit=2')
+        second = test_client.get(f"/recipes/search?q=brioche&limit=2&cursor={first.headers['X-Next-Cursor']}")
+        assert len(second.get_json()) == 1
+        assert 'X-Next-Cursor' not in second.headers
+
+        for offset in (True, 2.0, -1, 0, 3, 2 ** 64, '1'):
+            cursor = encode_cursor({'offset': offset})
+            assert test_client.get(f'/recipes/search?q=brioche&cursor={cursor}').status_code == 422
+
+    def test_treats_query_syntax_literally(self, test_client, new_user):
+        """Accepts FTS5 operators and quotes in q without erroring."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        assert test_client.get('/recipes/search?q=" OR owner:u1 NEAR(').status_code == 200
+        assert test_client.get('/recipes/search?q=').status_code == 422
+
+class TestRecipeExport:
+    """Recipe export tests."""
+
+    def test_streams_recipes_as_ndjson(self, test_client, new_user):
+        """Streams every recipe the user owns as one JSON object per line."""
+        recipes = [
+            Recipe(title=f'Export {i}', instructions='Bake.', minutes_to_complete=i, user_id=new_user.id)
+            for i in range(3)
+        ]
+        db.session.add_all(recipes)
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        response = test_client.get('/recipes/export')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert [line['id'] for line in lines] == [recipe.id for recipe in recipes]
+        assert lines[0]['instructions'] == 'Bake.'
+
+        resumed = test_client.get(f'/recipes/export?since_id={recipes[0].id}')
+        assert [json.loads(line)['id'] for line in resumed.data.decode().splitlines()] == \
+            [recipe.id for recipe in recipes[1:]]
+
+    def test_gzips_when_accepted(self, test_client, new_user):
+        """Compresses the stream when the client accepts gzip."""
+        db.session.add(Recipe(title='Zipped', instructions='Chill.', minutes_to_complete=5, user_id=new_user.id))
+        db.session.commit()
+
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        response = test_client.get('/recipes/export', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.data))['title'] == 'Zipped'
+
+    def test_rejects_invalid_since_id(self, test_client, new_user):
+        """Returns 422 before streaming for a non-numeric or out-of-range since_id."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = new_user.id
+
+        for since_id in ('abc', '1.5', str(2 ** 64), str(-2 ** 64)):
+            response = test_client.get(f'/recipes/export?since_id={since_id}')
+            assert response.status_code == 422
+            assert response.is_json
+
+    def test_export_requires_login(self, test_client):
+        """Returns 401 when user is not logged in."""
+        with test_client.session_transaction() as session:
+            session.clear()
+
+        assert test_client.get('/recipes/export').status_code == 401
+
 class TestRecipeModel:
     """Tests for Recipe model in models.py."""
 
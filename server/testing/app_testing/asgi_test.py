@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from asgi import ASGIApp, build_scope
+from models import User, Recipe
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'PASSWORD_HASH_ITERATIONS': 1000,
+        'RECIPES_BULK_BATCH_SIZE': 1,
+        'ASGI_MAX_BODY_SIZE': 1024,
+    })
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        user = User(username='streamer')
+        user.password = 'pikachu'
+        db.session.add(user)
+        db.session.commit()
+        yield ASGIApp(app)
+        db.drop_all()
+
+
+def logged_in_cookie(asgi_app):
+    with asgi_app.test_client() as client:
+        client.post('/login', json={'username': 'streamer', 'password': 'pikachu'})
+        return next(f'session={c.value}' for c in client.cookie_jar if c.name == 'session')
+
+
+class TestASGIRequestBodies:
+    """ASGI request body handling tests."""
+
+    def test_streams_fallback_bodies_to_flask(self, asgi_app):
+        """Feeds POST /recipes/bulk its NDJSON as it arrives, instead of buffering the upload first."""
+        lines = [json.dumps({'title': f'Chunk {i}', 'instructions': 'Stir.', 'minutes_to_complete': i}).encode()
+                 + b'\n' for i in range(20)]
+        environ = {'REQUEST_METHOD': 'POST', 'PATH_INFO': '/recipes/bulk', 'SERVER_NAME': 'localhost',
+                   'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'CONTENT_TYPE': 'application/x-ndjson',
+                   'HTTP_COOKIE': logged_in_cookie(asgi_app)}
+        delivered = []
+        first_insert = []
+        messages = []
+
+        async def receive():
+            delivered.append(lines[len(delivered)])
+            return {'type': 'http.request', 'body': delivered[-1], 'more_body': len(delivered) < len(lines)}
+
+        async def send(message):
+            messages.append(message)
+
+        def on_insert(conn, cursor, statement, *args):
+            if statement.startswith('INSERT INTO recipe') and not first_insert:
+                first_insert.append(len(delivered))
+
+        with asgi_app.flask_app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', on_insert)
+            try:
+                asyncio.run(asgi_app(build_scope(environ), receive, send))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', on_insert)
+
+            assert messages[0]['status'] == 201
+            assert json.loads(b''.join(m.get('body', b'') for m in messages[1:]))['created'] == 20
+            assert first_insert[0] < len(lines)  # Rows were stored before the upload finished
+            assert Recipe.query.count() == 20
+
+    def test_rejects_oversized_hot_route_bodies(self, asgi_app):
+        """Answers 413 instead of buffering a hot route body past ASGI_MAX_BODY_SIZE."""
+        with asgi_app.test_client() as client:
+            response = client.post('/login', json={'username': 'streamer', 'password': 'x' * 2048})
+            assert response.status_code == 413
+            assert response.get_json() == {'error': 'Request body too large.'}
+            assert client.post('/login', json={'username': 'streamer', 'password': 'pikachu'}).status_code == 200
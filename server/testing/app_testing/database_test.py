@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from app import create_app, db
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestDatabaseConfiguration:
+    """Engine and connection configuration tests."""
+
+    def test_applies_sqlite_pragmas_to_new_connections(self, tmp_path):
+        """Opens file-backed connections in WAL mode with the configured pragmas."""
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'tuned.db'}",
+            'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 3, 'pool_recycle': 600},
+        })
+
+        with app.app_context():
+            with db.engine.connect() as conn:
+                def pragma(name):
+                    return conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+                assert pragma('journal_mode') == 'wal'
+                assert pragma('synchronous') == 1  # NORMAL
+                assert pragma('busy_timeout') == 5000
+                assert pragma('cache_size') == -64000
+            assert db.engine.pool.size() == 3
+            assert db.engine.pool._recycle == 600
+            db.engine.dispose()
+
+    def test_reads_database_url_from_environment(self, tmp_path, monkeypatch):
+        """Takes the database URI from DATABASE_URL."""
+        uri = f"sqlite:///{tmp_path / 'from_env.db'}"
+        monkeypatch.setenv('DATABASE_URL', uri)
+        monkeypatch.setenv('SKIP_SCHEMA_CHECK', '1')
+
+        app = create_app('development')
+
+        assert app.config['SQLALCHEMY_DATABASE_URI'] == uri
+
+
+class TestStartup:
+    """Application factory and startup tests."""
+
+    def test_import_does_no_io(self, tmp_path):
+        """Importing the app module creates no app, database file or Alembic import."""
+        script = (
+            "import sys, app, asgi\n"
+            "assert 'app' not in vars(app) and 'app' not in vars(asgi)\n"
+            "assert 'alembic' not in sys.modules\n"
+        )
+        env = dict(os.environ, PYTHONPATH=SERVER_DIR, APP_CONFIG='development')
+        subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, check=True)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_config_name_defaults_to_app_config(self, monkeypatch):
+        """Takes the config name from APP_CONFIG and rejects unknown names."""
+        monkeypatch.setenv('APP_CONFIG', 'testing')
+        assert create_app().config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:///:memory:'
+
+        with pytest.raises(ValueError):
+            create_app('staging')
@@ -0,0 +1,69 @@
+import pytest
+from app import create_app, db
+from hashing import HasherSaturated, PasswordHasher
+
+
+@pytest.fixture
+def saturated_client():
+    """A test client whose hasher accepts no pending work."""
+    app = create_app('testing', {'PASSWORD_HASH_MAX_PENDING': 0})
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.drop_all()
+
+
+class TestPasswordHasher:
+    """Password hashing service tests."""
+
+    def test_hashes_in_worker_process(self):
+        """Hashes and verifies passwords in a process pool with the configured cost."""
+        hasher = PasswordHasher(iterations=1000, workers=1)
+        try:
+            password_hash = hasher.hash('pikachu')
+            assert password_hash.startswith('pbkdf2:sha256:1000$')
+            assert hasher.verify(password_hash, 'pikachu')
+            assert not hasher.verify(password_hash, 'raichu')
+        finally:
+            hasher.shutdown()
+
+    def test_pool_does_not_fork(self):
+        """Starts pool workers from a forkserver rather than forking the threaded server."""
+        hasher = PasswordHasher(iterations=1000, workers=1)
+        try:
+            hasher.hash('pikachu')
+            assert hasher._pool()._mp_context.get_start_method() in ('forkserver', 'spawn')
+        finally:
+            hasher.shutdown()
+
+    def test_pending_limit_defaults(self):
+        """Allows pending_per_worker calls per worker, and leaves inline hashing uncapped."""
+        assert PasswordHasher(workers=2, pending_per_worker=3).max_pending == 6
+        inline = PasswordHasher(iterations=1000, workers=0)
+        assert inline.max_pending is None
+        assert inline.verify(inline.hash('pikachu'), 'pikachu')
+
+    def test_records_latency_metrics(self):
+        """Counts hash and verify calls with their latency."""
+        hasher = PasswordHasher(iterations=1000, workers=0)
+        hasher.verify(hasher.hash('pikachu'), 'pikachu')
+
+        operations = hasher.metrics.snapshot()['operations']
+        assert operations['hash']['count'] == 1
+        assert operations['verify']['count'] == 1
+        assert operations['verify']['sum'] > 0
+
+    def test_rejects_when_saturated(self):
+        """Raises HasherSaturated instead of queueing past max_pending."""
+        hasher = PasswordHasher(workers=0, max_pending=0)
+        with pytest.raises(HasherSaturated):
+            hasher.hash('pikachu')
+        assert hasher.metrics.snapshot()['rejected'] == 1
+
+    def test_503s_when_saturated(self, saturated_client):
+        """Returns 503 with Retry-After at /signup when the hasher is saturated."""
+        response = saturated_client.post('/signup', json={'username': 'busy', 'password': 'pikachu'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
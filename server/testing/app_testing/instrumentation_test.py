@@ -0,0 +1,92 @@
+import re
+
+import pytest
+from app import create_app, db
+from config import load_config
+from models import User
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    """Set up a test client for the Flask application."""
+    app = create_app('testing', {'PASSWORD_HASH_ITERATIONS': 1000, 'SERVER_TIMING': True,
+                                 'METRICS_ALLOWED_IPS': ('127.0.0.1',)})
+    app.config['TESTING'] = True
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='ash')
+            user.password = 'pikachu'
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def server_timing(response):
+    """Parses a Server-Timing header into {name: (duration in ms, description)}."""
+    timings = {}
+    for metric in response.headers['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        timings[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return timings
+
+
+class TestRequestInstrumentation:
+    """Per-request instrumentation tests."""
+
+    def test_reports_query_count_and_db_time(self, test_client):
+        """Reports the SQL statements a request ran and their time in Server-Timing."""
+        test_client.post('/login', json={'username': 'ash', 'password': 'pikachu'})
+        response = test_client.get('/recipes')
+
+        timings = server_timing(response)
+        # Load the session's user version, then the page of recipes
+        assert timings['db'][1] == '2 queries'
+        assert timings['db'][0] > 0
+        assert timings['serialize'][0] > 0
+        assert timings['total'][0] >= timings['db'][0]
+
+    def test_reports_hash_time(self, test_client):
+        """Counts password verification towards the hash timing of /login."""
+        response = test_client.post('/login', json={'username': 'ash', 'password': 'pikachu'})
+        assert server_timing(response)['hash'][0] > 0
+
+    def test_exposes_prometheus_metrics(self, test_client):
+        """Serves per-route latency histograms and phase totals at /metrics."""
+        test_client.get('/plants')
+        test_client.get('/no-such-page')
+        body = test_client.get('/metrics').get_data(as_text=True)
+
+        assert 'http_request_duration_seconds_count{method="GET",route="/plants"} ' in body
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"} ' in body
+        assert '/no-such-page' not in body
+        assert re.search(r'http_request_db_queries_total\{method="POST",route="/login"\} [1-9]', body)
+        assert re.search(r'password_hash_duration_seconds_count\{operation="verify"\} [1-9]', body)
+
+    def test_hides_metrics_from_other_clients(self, test_client):
+        """404s /metrics outside METRICS_ALLOWED_IPS unless the request carries METRICS_TOKEN."""
+        outside = {'REMOTE_ADDR': '203.0.113.9'}
+        assert test_client.get('/metrics', environ_base=outside).status_code == 404
+
+        test_client.application.config['METRICS_TOKEN'] = 's3cret'
+        try:
+            assert test_client.get('/metrics', environ_base=outside,
+                                   headers={'Authorization': 'Bearer wrong'}).status_code == 404
+            assert test_client.get('/metrics', environ_base=outside,
+                                   headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+        finally:
+            test_client.application.config['METRICS_TOKEN'] = None
+
+    def test_server_timing_is_opt_in_outside_development(self):
+        """Sends Server-Timing by default only in development, and honours SERVER_TIMING everywhere."""
+        assert load_config('development', {})['SERVER_TIMING']
+        assert not load_config('production', {})['SERVER_TIMING']
+        assert load_config('production', {'SERVER_TIMING': '1'})['SERVER_TIMING']
+        assert load_config('production', {})['METRICS_ALLOWED_IPS'] == ()
+
+        response = create_app('testing').test_client().get('/plants')
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response.headers
@@ -0,0 +1,76 @@
+import pytest
+from flask import jsonify
+from app import create_app, db
+from models import User, Recipe
+from query_counter import QueryCounter, max_queries, normalize
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    """Set up a test client with one recipe from each of five users."""
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    @app.route('/authors')
+    def authors():
+        # Touches the lazy Recipe.user relationship once per row
+        return jsonify([recipe.user.username for recipe in Recipe.query.all()])
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            for i in range(5):
+                user = User(username=f'chef{i}', _password_hash='x')
+                db.session.add(user)
+                db.session.flush()
+                db.session.add(Recipe(title=f'Recipe {i}', instructions='Stir.', minutes_to_complete=i,
+                                      user_id=user.id))
+            db.session.commit()
+            with client.session_transaction() as session:
+                session['user_id'] = user.id
+            yield client
+            db.drop_all()
+
+
+class TestQueryCounter:
+    """N+1 query detector tests."""
+
+    @pytest.mark.allow_repeated_queries  # The N+1 is the point of this test
+    def test_reports_repeated_selects_as_n_plus_one(self, test_client):
+        """Flags a SELECT that one request runs once per row."""
+        db.session.expire_all()
+        with QueryCounter() as counter:
+            test_client.get('/authors')
+
+        problems = counter.violations()
+        assert len(problems) == 1
+        assert problems[0].startswith('N+1: a request ran the same SELECT 5 times')
+        assert 'FROM user' in problems[0]
+
+    def test_reports_requests_over_the_limit(self, test_client):
+        """Lists the statements of a request that runs more than the allowed number."""
+        with QueryCounter() as counter:
+            test_client.get('/recipes')
+
+        assert counter.per_request == [2]
+        assert counter.violations(limit=2) == []
+        assert counter.violations(limit=1)[0].startswith('A request ran 2 queries, more than 1:')
+
+    def test_ignores_queries_outside_requests(self, test_client):
+        """Does not count statements the test itself runs."""
+        with QueryCounter() as counter:
+            for user in User.query.all():
+                db.session.get(User, user.id)
+            test_client.get('/plants')
+
+        assert counter.per_request == []
+
+    def test_normalizes_literals(self):
+        """Treats statements that differ only in literal values as the same pattern."""
+        assert normalize("SELECT * FROM user WHERE id IN (1, 2, 3) AND name = 'a''b'") == \
+            normalize("SELECT *\n FROM user WHERE id IN (4) AND name = 'c'")
+
+    @max_queries(2)
+    def test_max_queries_marker(self, test_client):
+        """Passes when every request stays within its @max_queries bound."""
+        assert test_client.get('/recipes?limit=10').status_code == 200
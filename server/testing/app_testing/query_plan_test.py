@@ -0,0 +1,123 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from models import User, Recipe
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    """Set up a test client for the Flask application."""
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='planner')
+            user.password = 'password'
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all([
+                Recipe(title=f'Recipe {i}', instructions='Stir.', minutes_to_complete=i, user_id=user.id)
+                for i in range(20)
+            ])
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+@contextlib.contextmanager
+def recorded_selects():
+    """Collects every SELECT statement, with its parameters, run on the engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def assert_no_scans(statements):
+    """Fails on any full scan, or any sort that the index order could not serve."""
+    assert statements, "expected the request to issue at least one SELECT"
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            details = [row[-1] for row in plan]
+            assert not any(detail.startswith('SCAN') or 'TEMP B-TREE' in detail for detail in details), \
+                (statement, details)
+
+
+class TestQueryPlans:
+    """Query plan regression tests."""
+
+    def test_recipes_listing_uses_index(self, test_client):
+        """GET /recipes searches ix_recipe_user_id_id instead of scanning recipe."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = User.query.filter_by(username='planner').one().id
+
+        with recorded_selects() as statements:
+            response = test_client.get('/recipes?limit=5')
+            cursor = response.headers['X-Next-Cursor']
+            test_client.get(f'/recipes?limit=5&cursor={cursor}&fields=title')
+        assert_no_scans(statements)
+
+    @pytest.mark.parametrize('query', [
+        'sort=-id',
+        'sort=minutes_to_complete',
+        'sort=-minutes_to_complete&min_minutes=3&max_minutes=15',
+        'sort=title&title_prefix=Recipe 1',
+        'sort=-title&fields=minutes_to_complete',
+        'sort=minutes_to_complete&include=user',
+    ])
+    def test_sorted_and_filtered_listings_use_indexes(self, test_client, query):
+        """Every accepted sort/filter combination is served by an index, page after page."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = User.query.filter_by(username='planner').one().id
+
+        with recorded_selects() as statements:
+            response = test_client.get(f'/recipes?limit=2&{query}')
+            assert response.status_code == 200
+            test_client.get(f"/recipes?limit=2&{query}&cursor={response.headers['X-Next-Cursor']}")
+        assert_no_scans(statements)
+
+    def test_export_uses_index(self, test_client):
+        """GET /recipes/export streams through ix_recipe_user_id_id."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = User.query.filter_by(username='planner').one().id
+
+        with recorded_selects() as statements:
+            test_client.get('/recipes/export?since_id=3').data
+        assert_no_scans(statements)
+
+    def test_login_uses_index(self, test_client):
+        """POST /login looks users up through the username index."""
+        with recorded_selects() as statements:
+            response = test_client.post('/login', json={'username': 'planner', 'password': 'password'})
+        assert response.status_code == 200
+        assert_no_scans(statements)
+
+    def test_signup_issues_no_lookup(self, test_client):
+        """POST /signup relies on the unique constraint instead of a SELECT pre-check."""
+        with recorded_selects() as statements:
+            response = test_client.post('/signup', json={'username': 'planner', 'password': 'password'})
+        assert response.status_code == 422
+        assert statements == []
+
+    def test_stats_read_the_summary_row(self, test_client):
+        """GET /users/me/stats looks up primary keys and never reads the recipe table."""
+        with test_client.session_transaction() as session:
+            session['user_id'] = User.query.filter_by(username='planner').one().id
+
+        with recorded_selects() as statements:
+            response = test_client.get('/users/me/stats')
+        assert response.get_json()['recipe_count'] == 20
+        assert_no_scans(statements)
+        assert not any('FROM recipe' in statement for statement, _ in statements)
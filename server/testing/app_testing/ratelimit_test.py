@@ -0,0 +1,133 @@
+import pytest
+from app import create_app, db
+from asgi import ASGIApp
+from models import User
+from ratelimit import MemoryBackend, RateLimited, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def serve(kind, tmp_path, **config):
+    """Yields a test client for an app that allows 3 attempts per IP and 2 per username."""
+    database = tmp_path / 'app.db'
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+        'RATELIMIT_ENABLED': True,
+        'RATELIMIT_PER_IP': (3, 60),
+        'RATELIMIT_PER_USERNAME': (2, 60),
+        'RATELIMIT_MAX_KEYS': 100,
+        'PASSWORD_HASH_ITERATIONS': 1000,
+        **config,
+    })
+    app.config['TESTING'] = True
+    client = ASGIApp(app).test_client() if kind == 'asgi' else app.test_client()
+
+    with client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='ash')
+            user.password = 'pikachu'
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def test_client(request, tmp_path):
+    """A rate-limited test client with clients connecting directly."""
+    yield from serve(request.param, tmp_path)
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def proxied_client(request, tmp_path):
+    """A rate-limited test client behind one trusted reverse proxy."""
+    yield from serve(request.param, tmp_path, TRUSTED_PROXIES=1)
+
+
+def log_in(client, username, ip='10.0.0.1', forwarded_for=None):
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    return client.post('/login', json={'username': username, 'password': 'wrong'},
+                       environ_base={'REMOTE_ADDR': ip}, headers=headers)
+
+
+class TestMemoryBackend:
+    """In-memory token bucket tests."""
+
+    def test_refills_over_time(self):
+        """Allows a burst of capacity requests, then one more per refill interval."""
+        clock = FakeClock()
+        backend = MemoryBackend(clock=clock)
+
+        assert [backend.take('ip:1', rate=0.5, capacity=2) for _ in range(2)] == [0, 0]
+        assert backend.take('ip:1', rate=0.5, capacity=2) == pytest.approx(2.0)
+        clock.now = 1.0
+        assert backend.take('ip:1', rate=0.5, capacity=2) == pytest.approx(1.0)
+        clock.now = 2.0
+        assert backend.take('ip:1', rate=0.5, capacity=2) == 0
+
+    def test_bounds_memory(self):
+        """Keeps at most max_keys buckets, evicting the least recently used."""
+        backend = MemoryBackend(max_keys=10, clock=FakeClock())
+        for i in range(100):
+            backend.take(f'ip:{i}', rate=1, capacity=1)
+        assert len(backend._buckets) == 10
+
+    def test_raises_with_whole_seconds(self):
+        """Reports the wait as whole seconds, rounded up."""
+        limiter = RateLimiter(MemoryBackend(clock=FakeClock()), {'ip': (1, 90)})
+        limiter.hit(ip='10.0.0.1')
+        with pytest.raises(RateLimited) as excinfo:
+            limiter.hit(ip='10.0.0.1')
+        assert excinfo.value.retry_after == 90
+
+
+class TestAuthRateLimits:
+    """Rate limiting tests for /login and /signup."""
+
+    def test_429s_per_username_before_hashing(self, test_client):
+        """Returns 429 with Retry-After once a username is over its limit, without verifying the password."""
+        hasher = test_client.application.extensions['password_hasher']
+        assert log_in(test_client, 'ash', ip='10.0.0.1').status_code == 401
+        assert log_in(test_client, 'ash', ip='10.0.0.2').status_code == 401
+        verified = hasher.metrics.snapshot()['operations']['verify']['count']
+
+        response = log_in(test_client, 'ash', ip='10.0.0.3')
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '30'
+        assert hasher.metrics.snapshot()['operations']['verify']['count'] == verified
+
+    def test_429s_per_ip(self, test_client):
+        """Limits one IP across usernames, shared between /login and /signup."""
+        assert log_in(test_client, 'misty').status_code == 401
+        assert log_in(test_client, 'brock').status_code == 401
+        response = test_client.post('/signup', json={'username': 'gary', 'password': 'eevee'},
+                                    environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        assert response.status_code == 201
+
+        response = test_client.post('/signup', json={'username': 'oak', 'password': 'eevee'},
+                                    environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        assert response.status_code == 429
+        assert User.query.filter_by(username='oak').first() is None
+        assert log_in(test_client, 'ash', ip='10.0.0.9').status_code == 401
+
+    def test_ignores_forwarded_for_by_default(self, test_client):
+        """Keys on the connecting address, so a client can't dodge its bucket with X-Forwarded-For."""
+        for i, username in enumerate(('misty', 'brock', 'gary')):
+            assert log_in(test_client, username, forwarded_for=f'203.0.113.{i}').status_code == 401
+        assert log_in(test_client, 'oak', forwarded_for='203.0.113.9').status_code == 429
+
+    def test_keys_on_forwarded_client_behind_trusted_proxy(self, proxied_client):
+        """Gives each client behind the proxy its own bucket, using the address the proxy appended."""
+        for username in ('misty', 'brock', 'gary'):
+            assert log_in(proxied_client, username, forwarded_for='203.0.113.1').status_code == 401
+        assert log_in(proxied_client, 'oak', forwarded_for='203.0.113.1').status_code == 429
+        assert log_in(proxied_client, 'oak', forwarded_for='203.0.113.2').status_code == 401
+        # Only the proxy's entry is trusted; whatever the client prepended is not
+        assert log_in(proxied_client, 'elm', forwarded_for='198.51.100.7, 203.0.113.1').status_code == 429
@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import func, insert, select
+from app import create_app, db
+from models import User, Recipe
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app with a primary database file and one replica file."""
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {'replica_0': f"sqlite:///{tmp_path / 'replica.db'}"},
+        'SQLALCHEMY_READ_REPLICAS': ['replica_0'],
+        'PASSWORD_HASH_ITERATIONS': 1000,
+    })
+    app.config['TESTING'] = True
+    with app.app_context():
+        replica = db.engines['replica_0']
+        db.metadata.create_all(replica)
+        user = User(username='ash')
+        user.password = 'pikachu'
+        db.session.add(user)
+        db.session.commit()
+        # The replica has the same user plus a recipe the primary doesn't, so
+        # each test can tell which database answered
+        with replica.begin() as conn:
+            conn.execute(insert(User), [{'id': user.id, 'username': 'ash', '_password_hash': user._password_hash}])
+            conn.execute(insert(Recipe), [{'title': 'Replica only', 'instructions': 'Read me.',
+                                           'minutes_to_complete': 1, 'user_id': user.id}])
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def recipe_count():
+    return db.session.execute(select(func.count()).select_from(Recipe)).scalar()
+
+
+class TestReadReplicaRouting:
+    """Read/write session routing tests."""
+
+    def test_reads_go_to_the_replica(self, app):
+        """Serves GET /recipes and login lookups from the replica."""
+        client = app.test_client()
+        assert client.post('/login', json={'username': 'ash', 'password': 'pikachu'}).status_code == 200
+
+        response = client.get('/recipes')
+        assert [recipe['title'] for recipe in response.get_json()] == ['Replica only']
+
+    def test_writes_go_to_the_primary(self, app):
+        """Inserts from POST /recipes land on the primary only."""
+        client = app.test_client()
+        client.post('/login', json={'username': 'ash', 'password': 'pikachu'})
+
+        response = client.post('/recipes', json={'title': 'New', 'instructions': 'Write me.', 'minutes_to_complete': 2})
+        assert response.status_code == 201
+
+        with app.app_context():
+            with db.engines[None].connect() as primary, db.engines['replica_0'].connect() as replica:
+                assert primary.execute(select(Recipe.title)).scalars().all() == ['New']
+                assert replica.execute(select(Recipe.title)).scalars().all() == ['Replica only']
+
+    def test_reads_follow_writes_to_the_primary(self, app):
+        """After a write, the same session keeps reading from the primary, even after commit."""
+        with app.app_context():
+            assert recipe_count() == 1  # Replica
+
+            db.session.add(Recipe(title='Mine', instructions='Own write.', minutes_to_complete=3,
+                                  user_id=User.query.first().id))
+            db.session.commit()
+
+            assert [title for title, in db.session.execute(select(Recipe.title))] == ['Mine']
+            db.session.remove()
+
+            assert recipe_count() == 1  # A fresh session reads from the replica again
+
+    def test_primary_can_be_forced(self, app):
+        """Honors bind_arguments={'primary': True} for reads."""
+        with app.app_context():
+            count = db.session.execute(select(func.count()).select_from(Recipe),
+                                       bind_arguments={'primary': True}).scalar()
+            assert count == 0
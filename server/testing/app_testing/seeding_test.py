@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import func, select, text
+from app import create_app, db
+from models import User, Recipe, UserSession
+from seeding import seed
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', {'PASSWORD_HASH_ITERATIONS': 1000})
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def dataset():
+    # Ids differ between seeds, so recipes are compared by content and owner
+    return (
+        db.session.execute(select(User.username, User.bio).order_by(User.id)).all(),
+        db.session.execute(select(Recipe.title, Recipe.instructions, Recipe.minutes_to_complete, User.username)
+                           .join(Recipe.user).order_by(Recipe.id)).all(),
+    )
+
+
+class TestSeeding:
+    """Synthetic data generator tests."""
+
+    def test_builds_the_same_rows_for_a_seed(self, app):
+        """Replaces existing rows with exactly the requested counts, identically for the same seed."""
+        hasher = app.extensions['password_hasher']
+        seed(db.engine, 5, 50, rng_seed=3, batch_size=7, hasher=hasher)
+        first = dataset()
+        seed(db.engine, 5, 50, rng_seed=3, batch_size=20, hasher=hasher)
+        db.session.expire_all()
+
+        assert dataset() == first
+        assert len(first[0]) == 5
+        assert len(first[1]) == 50
+        assert len({user.username for user in first[0]}) == 5
+
+        seed(db.engine, 5, 50, rng_seed=4, hasher=hasher)
+        assert dataset() != first
+
+    def test_rebuilds_trigger_maintained_data(self, app):
+        """Leaves ETag versions, the search index and the triggers as inserting row by row would."""
+        seed(db.engine, 3, 30, hasher=app.extensions['password_hasher'])
+
+        counts = dict(db.session.execute(
+            select(Recipe.user_id, func.count()).group_by(Recipe.user_id)).all())
+        assert {user.id: user.recipes_version for user in User.query} == counts
+        word = Recipe.query.first().title.split()[0].lower()
+        assert db.session.execute(
+            text("SELECT count(*) FROM recipe_fts WHERE recipe_fts MATCH :word"), {'word': word}).scalar() > 0
+
+        user = User.query.order_by(User.id).first()
+        db.session.add(Recipe(title='After seeding', instructions='Stir.', minutes_to_complete=1, user_id=user.id))
+        db.session.commit()
+        db.session.refresh(user)
+        assert user.recipes_version == counts[user.id] + 1
+
+    def test_reseeding_signs_everyone_out(self, app):
+        """Drops sessions and never reuses user or recipe ids, so old cookies don't log in as new users."""
+        hasher = app.extensions['password_hasher']
+        seed(db.engine, 3, 10, hasher=hasher)
+        old_users = set(db.session.scalars(select(User.id)))
+        old_recipes = set(db.session.scalars(select(Recipe.id)))
+        client = app.test_client()
+        username = User.query.order_by(User.id).first().username
+        assert client.post('/login', json={'username': username, 'password': 'password'}).status_code == 200
+        assert client.get('/recipes').status_code == 200
+
+        seed(db.engine, 3, 10, hasher=hasher)
+        app.session_interface.store.cache.clear()  # As in a fresh server process; the rows are what matter
+
+        assert client.get('/recipes').status_code == 401
+        assert db.session.execute(select(func.count()).select_from(UserSession)).scalar() == 0
+        assert old_users.isdisjoint(db.session.scalars(select(User.id)))
+        assert old_recipes.isdisjoint(db.session.scalars(select(Recipe.id)))
+
+    def test_shares_one_password_hash(self, app):
+        """Gives every user the same precomputed hash, which still logs in."""
+        hasher = app.extensions['password_hasher']
+        seed(db.engine, 4, 0, password='pikachu', hasher=hasher)
+
+        assert db.session.execute(select(func.count(User._password_hash.distinct()))).scalar() == 1
+        user = User.query.first()
+        response = app.test_client().post('/login', json={'username': user.username, 'password': 'pikachu'})
+        assert response.status_code == 200
+
+    def test_hashes_per_user_passwords(self, app):
+        """Hashes '<username><password>' for each user when shared_hash is off."""
+        seed(db.engine, 2, 0, hasher=app.extensions['password_hasher'], shared_hash=False)
+
+        for user in User.query:
+            assert user.verify_password(f'{user.username}password')
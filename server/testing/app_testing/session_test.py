@@ -0,0 +1,166 @@
+from datetime import datetime
+
+import pytest
+from app import create_app, db
+from asgi import ASGIApp
+from cache import LRUCache
+from models import User, UserSession
+from sessions import SessionBackend, SessionStore
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    """Set up a test client for the Flask application."""
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.drop_all()
+
+
+@pytest.fixture
+def user(test_client):
+    user = User(username=f'trainer{User.query.count()}')
+    user.password = 'pikachu'
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def log_in(client, user):
+    response = client.post('/login', json={'username': user.username, 'password': 'pikachu'})
+    assert response.status_code == 200
+
+
+class CountingBackend(SessionBackend):
+    def __init__(self, entry):
+        self.entry = entry
+        self.loads = 0
+
+    def load(self, sid):
+        self.loads += 1
+        return self.entry
+
+
+class TestServerSideSessions:
+    """Server-side session tests."""
+
+    def test_cookie_carries_only_the_session_id(self, test_client, user):
+        """Stores session data in user_session and keeps the cookie a fixed-size id."""
+        log_in(test_client, user)
+
+        cookie = next(c for c in test_client.cookie_jar if c.name == 'session')
+        row = db.session.get(UserSession, cookie.value)
+        assert row is not None
+        assert row.user_id == user.id
+        assert len(cookie.value) == 43
+
+    def test_logout_deletes_the_stored_session(self, test_client, user):
+        """Deletes the user_session row at /logout, so the old cookie stops working."""
+        log_in(test_client, user)
+        assert test_client.delete('/logout').status_code == 204
+
+        assert UserSession.query.filter_by(user_id=user.id).count() == 0
+        assert test_client.get('/recipes').status_code == 401
+
+    def test_revoked_sessions_stop_authenticating(self, test_client, user):
+        """Forced logout through revoke_user invalidates cached sessions immediately."""
+        log_in(test_client, user)
+        assert test_client.get('/recipes').status_code == 200
+
+        assert test_client.application.session_interface.store.revoke_user(user.id) == 1
+        assert test_client.get('/recipes').status_code == 401
+
+    def test_revoke_sessions_command(self, test_client, user):
+        """Revokes a user's sessions with `flask revoke-sessions`."""
+        log_in(test_client, user)
+
+        runner = test_client.application.test_cli_runner()
+        result = runner.invoke(args=['revoke-sessions', user.username])
+
+        assert result.exit_code == 0
+        assert 'Revoked 1 session(s)' in result.output
+        assert test_client.get('/recipes').status_code == 401
+
+    def test_sessions_of_deleted_users_do_not_authenticate(self, test_client, user):
+        """Treats sessions whose user no longer exists as logged out."""
+        log_in(test_client, user)
+        test_client.application.session_interface.store.cache.clear()
+
+        db.session.delete(user)
+        db.session.commit()
+
+        assert test_client.get('/recipes').status_code == 401
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def fixation_app(request, tmp_path):
+    """An app with two users, served over WSGI or ASGI, on a file both modes can share."""
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+                                 'PASSWORD_HASH_ITERATIONS': 1000})
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        for username in ('attacker', 'victim'):
+            user = User(username=username)
+            user.password = 'pikachu'
+            db.session.add(user)
+        db.session.commit()
+        make_client = ASGIApp(app).test_client if request.param == 'asgi' else app.test_client
+        yield make_client
+        db.drop_all()
+
+
+def session_cookie(client):
+    return next(c.value for c in client.cookie_jar if c.name == 'session')
+
+
+class TestSessionFixation:
+    """Session id regeneration tests."""
+
+    def test_login_issues_a_new_session_id(self, fixation_app):
+        """Replaces a session id planted before login, so the planter's cookie never authenticates."""
+        with fixation_app() as attacker:
+            log_in(attacker, User.query.filter_by(username='attacker').one())
+            planted = session_cookie(attacker)
+
+            with fixation_app() as victim:
+                victim.set_cookie('localhost', 'session', planted)
+                log_in(victim, User.query.filter_by(username='victim').one())
+                assert session_cookie(victim) != planted
+                assert victim.get('/recipes').status_code == 200
+
+            assert db.session.get(UserSession, planted) is None
+            assert attacker.get('/recipes').status_code == 401
+
+
+class TestSessionStore:
+    """Session store cache tests."""
+
+    def test_serves_repeat_lookups_from_cache(self):
+        """Loads a session from the backend once, then from the LRU cache."""
+        backend = CountingBackend(('{}', 1, datetime.max))
+        store = SessionStore(backend, LRUCache(10, ttl=60))
+
+        store.get('sid')
+        store.get('sid')
+
+        assert backend.loads == 1
+
+    def test_lru_cache_evicts_and_expires(self):
+        """Evicts least recently used entries past max_entries and expired ones past their TTL."""
+        now = [0.0]
+        cache = LRUCache(max_entries=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+
+        now[0] = 11.0
+        assert cache.get('a') is None
@@ -0,0 +1,39 @@
+import threading
+
+from app import create_app, db
+from models import User
+
+SIGNUPS = 8
+
+
+class TestConcurrentSignup:
+    """Concurrent signup tests."""
+
+    def test_only_one_of_many_parallel_signups_wins(self, tmp_path):
+        """Exactly one of N simultaneous signups for the same username gets a 201."""
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'signup.db'}",
+            'PASSWORD_HASH_ITERATIONS': 1000,
+            'PASSWORD_HASH_MAX_PENDING': SIGNUPS,
+        })
+        app.config['TESTING'] = True
+
+        barrier = threading.Barrier(SIGNUPS)
+        statuses = []
+
+        def signup():
+            client = app.test_client()
+            barrier.wait()
+            response = client.post('/signup', json={'username': 'ash', 'password': 'pikachu'})
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=signup) for _ in range(SIGNUPS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == [201] + [422] * (SIGNUPS - 1)
+        with app.app_context():
+            assert User.query.filter_by(username='ash').count() == 1
+            db.engine.dispose()
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+from app import create_app, db
+from models import User, Recipe, UserRecipeStats
+from query_counter import max_queries
+from stats import rebuild_recipe_stats
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing', {'PASSWORD_HASH_ITERATIONS': 1000})
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([User(id=i, username=f'cook{i}', password='password') for i in (1, 2, 3)])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+def summaries():
+    return db.session.execute(select(UserRecipeStats.__table__).order_by(UserRecipeStats.user_id)).all()
+
+
+def add_recipe(user_id, minutes):
+    db.session.add(Recipe(title='Stew', instructions='Simmer.', minutes_to_complete=minutes, user_id=user_id))
+    db.session.commit()
+
+
+class TestRecipeStats:
+    """Per-user recipe summary tests."""
+
+    def test_triggers_match_a_rebuild(self, app):
+        """Keeps the summary equal to a from-scratch rebuild through inserts, updates, moves and deletes."""
+        rng = random.Random(5)
+        db.session.execute(insert(Recipe), [
+            {'title': 'Stew', 'instructions': 'Simmer.', 'minutes_to_complete': rng.randint(1, 50),
+             'user_id': rng.randint(1, 3)}
+            for _ in range(60)
+        ])
+        for _ in range(40):
+            recipe_id = rng.choice(db.session.execute(select(Recipe.id)).scalars().all())
+            action = rng.choice(('minutes', 'owner', 'delete'))
+            if action == 'delete':
+                db.session.execute(delete(Recipe).where(Recipe.id == recipe_id))
+            elif action == 'owner':
+                db.session.execute(update(Recipe).where(Recipe.id == recipe_id).values(user_id=rng.randint(1, 3)))
+            else:
+                db.session.execute(update(Recipe).where(Recipe.id == recipe_id)
+                                   .values(minutes_to_complete=rng.randint(1, 50)))
+        db.session.commit()
+
+        maintained = summaries()
+        with db.engine.begin() as conn:
+            rebuild_recipe_stats(conn)
+        # The rebuild only has rows for users who still own recipes
+        assert [row for row in maintained if row.recipe_count] == summaries()
+
+    def test_deleting_the_extremes_finds_the_next_ones(self, app):
+        """Replaces min, max and latest from the remaining recipes, and empties when the last one goes."""
+        for minutes in (10, 30, 20):
+            add_recipe(1, minutes)
+        latest = db.session.execute(select(Recipe.id).order_by(Recipe.id.desc())).scalar()
+
+        db.session.execute(delete(Recipe).where(Recipe.minutes_to_complete.in_((10, 30))))
+        db.session.commit()
+        stats = db.session.get(UserRecipeStats, 1)
+        assert (stats.recipe_count, stats.minutes_total, stats.min_minutes, stats.max_minutes,
+                stats.latest_recipe_id) == (1, 20, 20, 20, latest)
+
+        db.session.execute(delete(Recipe))
+        db.session.commit()
+        db.session.refresh(stats)
+        assert (stats.recipe_count, stats.minutes_total, stats.min_minutes, stats.max_minutes,
+                stats.latest_recipe_id) == (0, 0, None, None, None)
+
+    @max_queries(2)
+    def test_serves_stats_from_the_summary_row(self, app):
+        """Returns count, average, min, max and latest id for the logged-in user at /users/me/stats."""
+        for minutes in (10, 25, 40):
+            add_recipe(1, minutes)
+        add_recipe(2, 99)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+
+        response = client.get('/users/me/stats')
+        assert response.status_code == 200
+        latest = db.session.execute(select(Recipe.id).where(Recipe.user_id == 1).order_by(Recipe.id.desc())).scalar()
+        assert response.get_json() == {'recipe_count': 3, 'average_minutes': 25.0, 'min_minutes': 10,
+                                       'max_minutes': 40, 'latest_recipe_id': latest}
+
+    def test_serves_empty_stats_without_recipes(self, app):
+        """Returns a zero count and nulls for a user who has no recipes yet."""
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 3
+
+        response = client.get('/users/me/stats')
+        assert response.get_json() == {'recipe_count': 0, 'average_minutes': None, 'min_minutes': None,
+                                       'max_minutes': None, 'latest_recipe_id': None}
+
+    def test_returns_401_when_logged_out(self, app):
+        """Returns a 401 status code at /users/me/stats without a session."""
+        assert app.test_client().get('/users/me/stats').status_code == 401
+
+    def test_rebuild_command(self, app):
+        """Backfills the summary with `flask rebuild-stats`."""
+        add_recipe(1, 15)
+        add_recipe(2, 5)
+        db.session.execute(delete(UserRecipeStats))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['rebuild-stats'])
+        assert 'Rebuilt recipe stats for 2 user(s).' in result.output
+        assert [(row.user_id, row.recipe_count, row.minutes_total) for row in summaries()] == [(1, 1, 15), (2, 1, 5)]
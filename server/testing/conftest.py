@@ -1,9 +1,17 @@
+import os
+
 import pytest
-from server.app import app, db
+
+# Select the in-memory test config for the lazily created module-level app
+os.environ.setdefault('APP_CONFIG', 'testing')
+
+from app import create_app, db
+from query_counter import QueryCounter
 
 @pytest.fixture(scope='module')
 def client():
     """Set up a test client for the Flask application."""
+    app = create_app('testing')
     app.config['TESTING'] = True
     with app.test_client() as client:
         with app.app_context():
@@ -14,12 +22,33 @@ def client():
 @pytest.fixture(scope='module')
 def init_database():
     """Set up the database and create a user for tests."""
+    app = create_app('testing')
     with app.app_context():
         db.create_all()  # Set up the database
         # You can add initial data here if needed
         yield
         db.drop_all()  # Clean up after tests
 
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'max_queries(n): fail if any request runs more than n SQL statements')
+    config.addinivalue_line('markers', 'allow_repeated_queries: skip N+1 detection for this test')
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Fails tests whose requests exceed their @max_queries bound or repeat a SELECT per row."""
+    marker = item.get_closest_marker('max_queries')
+    limit = marker.args[0] if marker else None
+    repeat_threshold = marker.kwargs.get('repeat_threshold') if marker else None
+    if item.get_closest_marker('allow_repeated_queries'):
+        repeat_threshold = float('inf')
+    with QueryCounter() as counter:
+        result = yield
+    kwargs = {'repeat_threshold': repeat_threshold} if repeat_threshold is not None else {}
+    problems = counter.violations(limit, **kwargs)
+    if problems:
+        pytest.fail('\n'.join(problems), pytrace=False)
+    return result
+
 def pytest_itemcollected(item):
     """Customizes test item names in the output."""
     par = item.parent.obj
@@ -28,3 +57,5 @@ def pytest_itemcollected(item):
     suf = node.__doc__.strip() if node.__doc__ else node.__name__
     if pref or suf:
         item._nodeid = ' '.join((pref, suf))
+        if hasattr(item, 'callspec'):
+            item._nodeid += f' [{item.callspec.id}]'  # Tell parametrized runs apart
@@ -0,0 +1,59 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from flask_migrate import upgrade
+from app import create_app
+from models import db
+from schema import SchemaMismatchError, head_revision, include_object
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'schema.db'}"
+
+
+def migrate_to_head(database_uri, monkeypatch):
+    monkeypatch.setenv('SKIP_SCHEMA_CHECK', '1')
+    app = create_app('development', {'SQLALCHEMY_DATABASE_URI': database_uri})
+    with app.app_context():
+        upgrade()
+    monkeypatch.delenv('SKIP_SCHEMA_CHECK')
+    return app
+
+
+class TestSchema:
+    '''Tests that the migrations and models.py describe the same schema.'''
+
+    def test_migrations_match_models(self, database_uri, monkeypatch):
+        '''Upgrading an empty database to head yields exactly the schema in models.py.'''
+        app = migrate_to_head(database_uri, monkeypatch)
+        with app.app_context():
+            with db.engine.connect() as conn:
+                context = MigrationContext.configure(
+                    conn, opts={'compare_type': True, 'include_object': include_object})
+                assert compare_metadata(context, db.metadata) == []
+
+    def test_migrations_create_model_triggers_and_views(self, database_uri, tmp_path, monkeypatch):
+        '''Upgrading to head creates the same triggers and views as create_all() does from models.py.'''
+        def triggers(app):
+            with app.app_context():
+                with db.engine.connect() as conn:
+                    return dict(conn.exec_driver_sql(
+                        "SELECT name, sql FROM sqlite_master WHERE type IN ('trigger', 'view')").all())
+
+        migrated = triggers(migrate_to_head(database_uri, monkeypatch))
+        created = triggers(create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'models.db'}"}))
+        assert migrated == created
+
+    def test_boots_at_head_revision(self, database_uri, monkeypatch):
+        '''Starts normally once the database is at the head revision.'''
+        migrate_to_head(database_uri, monkeypatch)
+        app = create_app('development', {'SQLALCHEMY_DATABASE_URI': database_uri})
+        with app.app_context():
+            with db.engine.connect() as conn:
+                assert MigrationContext.configure(conn).get_current_revision() == head_revision()
+
+    def test_refuses_to_boot_on_unmigrated_database(self, database_uri):
+        '''Raises SchemaMismatchError instead of silently creating tables.'''
+        with pytest.raises(SchemaMismatchError):
+            create_app('development', {'SQLALCHEMY_DATABASE_URI': database_uri})
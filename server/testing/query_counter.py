@@ -0,0 +1,72 @@
+import re
+from collections import Counter
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from instrumentation import current_timings
+
+# A SELECT run this many times in one request is reported as an N+1 pattern
+REPEAT_THRESHOLD = 3
+
+
+def max_queries(n, repeat_threshold=REPEAT_THRESHOLD):
+    """Fails the test if any request it makes runs more than n SQL statements."""
+    return pytest.mark.max_queries(n, repeat_threshold=repeat_threshold)
+
+
+def normalize(statement):
+    """Collapses literals and IN lists so statements that differ only in values compare equal."""
+    statement = re.sub(r"'(?:[^']|'')*'", '?', statement)
+    statement = re.sub(r'\b\d+\b', '?', statement)
+    statement = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?)', statement)
+    return ' '.join(statement.split())
+
+
+class QueryCounter:
+    """Records the statements each request runs, on every engine.
+
+    Statements are grouped by the request they ran in, as tracked by the
+    request instrumentation, so work done by the test itself (fixtures,
+    assertions) is not counted against the app.
+    """
+
+    def __init__(self):
+        self.requests = {}
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        timings = current_timings()
+        if timings is not None:
+            self.requests.setdefault(timings, []).append(statement)
+
+    @property
+    def per_request(self):
+        """Statement counts, one per request, in the order the requests ran."""
+        return [len(statements) for statements in self.requests.values()]
+
+    def repeated_selects(self, threshold=REPEAT_THRESHOLD):
+        """Yields (statement, times) for each SELECT a request ran at least threshold times."""
+        for statements in self.requests.values():
+            patterns = Counter(normalize(statement) for statement in statements
+                               if statement.lstrip().upper().startswith('SELECT'))
+            for statement, times in patterns.items():
+                if times >= threshold:
+                    yield statement, times
+
+    def violations(self, limit=None, repeat_threshold=REPEAT_THRESHOLD):
+        problems = []
+        for statements in self.requests.values():
+            if limit is not None and len(statements) > limit:
+                listing = '\n'.join(f'    {statement}' for statement in statements)
+                problems.append(f'A request ran {len(statements)} queries, more than {limit}:\n{listing}')
+        for statement, times in self.repeated_selects(repeat_threshold):
+            problems.append(f'N+1: a request ran the same SELECT {times} times:\n    {statement}')
+        return problems
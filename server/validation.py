@@ -0,0 +1,54 @@
+class InvalidRecipe(ValueError):
+    """Raised when a recipe payload is missing or has malformed fields."""
+
+
+# A 32-bit column on any backend, and far enough below SQLite's 64-bit limit that
+# user_recipe_stats.minutes_total can't overflow summing them
+MAX_MINUTES = 2 ** 31 - 1
+
+
+def clean_text(value):
+    if not isinstance(value, str) or not value:
+        raise InvalidRecipe("Invalid recipe data.")
+    return value
+
+
+def clean_minutes(value):
+    # bool is an int subclass; digit strings are what HTML number inputs submit
+    if isinstance(value, str) and value.isascii() and value.isdigit() and len(value) <= len(str(MAX_MINUTES)):
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise InvalidRecipe("minutes_to_complete must be an integer.")
+    if not 0 <= value <= MAX_MINUTES:
+        raise InvalidRecipe(f"minutes_to_complete must be between 0 and {MAX_MINUTES}.")
+    return value
+
+
+CLEANERS = {'title': clean_text, 'instructions': clean_text, 'minutes_to_complete': clean_minutes}
+
+
+def validate_recipe(data):
+    """Returns the column values for a recipe payload, or raises InvalidRecipe.
+
+    Shared by POST /recipes and POST /recipes/bulk so both accept exactly the
+    same rows. Values are type-checked here, so a bad row is rejected on its
+    own rather than failing the database insert for its whole batch.
+    """
+    if not isinstance(data, dict):
+        raise InvalidRecipe("Invalid recipe data.")
+    return {field: clean(data.get(field)) for field, clean in CLEANERS.items()}
+
+
+def validate_recipe_patch(data):
+    """Returns only the column values a PATCH /recipes/<id> payload sets, or raises InvalidRecipe.
+
+    Each field present must be valid as it would be for validate_recipe();
+    fields left out are not written at all.
+    """
+    if not isinstance(data, dict) or not data:
+        raise InvalidRecipe("No fields to update.")
+
+    unknown = set(data) - set(CLEANERS)
+    if unknown:
+        raise InvalidRecipe(f"Unknown field(s): {', '.join(sorted(unknown))}.")
+    return {field: CLEANERS[field](value) for field, value in data.items()}